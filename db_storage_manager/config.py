@@ -27,6 +27,7 @@ SETTINGS_FILE = USER_DATA_DIR / "settings.enc"
 SSH_KEYS_FILE = USER_DATA_DIR / "ssh-keys.enc"
 SCHEDULED_BACKUPS_FILE = USER_DATA_DIR / "scheduled-backups.json"
 BACKUP_DIR = USER_DATA_DIR / "backups"
+CACHE_DIR = USER_DATA_DIR / "cache"
 MASTER_KEY_FILE = USER_DATA_DIR / ".master-key"
 
 # Ensure backup directory exists
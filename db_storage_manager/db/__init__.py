@@ -10,6 +10,7 @@ from .base import (
     SchemaInfo,
 )
 from .factory import DatabaseConnectionFactory
+from .pool import DatabasePool, DatabasePools
 
 __all__ = [
     "DatabaseConnection",
@@ -18,4 +19,6 @@ __all__ = [
     "QueryResult",
     "SchemaInfo",
     "DatabaseConnectionFactory",
+    "DatabasePool",
+    "DatabasePools",
 ]
@@ -2,10 +2,115 @@
 Base database connection interface
 """
 
+import asyncio
+import os
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, TypedDict
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypedDict,
+    Union,
+)
 from dataclasses import dataclass
 
+# Leading keyword checks; match() stops after the first token so the cost
+# does not grow with the length of the query text. Leading /* */ and --
+# comments (e.g. optimizer hints) are skipped.
+_LEADING_COMMENTS = r"\s*(?:(?:/\*.*?\*/|--[^\n]*(?:\n|$))\s*)*"
+_SELECT_RE = re.compile(_LEADING_COMMENTS + r"SELECT\b", re.IGNORECASE | re.DOTALL)
+# Queries worth an EXPLAIN, including SELECTs written with a leading CTE
+_EXPLAINABLE_RE = re.compile(
+    _LEADING_COMMENTS + r"(?:SELECT|WITH)\b", re.IGNORECASE | re.DOTALL
+)
+
+# Statements that change the catalog and must invalidate cached metadata
+_DDL_RE = re.compile(
+    _LEADING_COMMENTS + r"(?:CREATE|DROP|ALTER|TRUNCATE|RENAME)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Whitespace outside string literals; runs of it do not change a query
+_SQL_SPACE_RE = re.compile(r"('[^']*'|\"[^\"]*\")|\s+")
+
+
+def is_select_query(query: str) -> bool:
+    """Check whether a query is a SELECT statement"""
+    return _SELECT_RE.match(query) is not None
+
+
+def is_explainable_query(query: str) -> bool:
+    """Check whether a query is a SELECT, with or without a WITH clause"""
+    return _EXPLAINABLE_RE.match(query) is not None
+
+
+def is_ddl_query(query: str) -> bool:
+    """Check whether a query changes the database schema"""
+    return _DDL_RE.match(query) is not None
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace outside string literals, for use as a cache key"""
+    return _SQL_SPACE_RE.sub(lambda m: m.group(1) or " ", query).strip()
+
+
+FETCH_BATCH_SIZE = 1000
+
+
+def fetch_rows(
+    cursor: Any, max_rows: Optional[int] = None, batch_size: int = FETCH_BATCH_SIZE
+) -> List[Any]:
+    """Read a DB-API cursor in ``fetchmany`` batches, stopping at ``max_rows``"""
+    rows: List[Any] = []
+    while max_rows is None or len(rows) < max_rows:
+        size = (
+            batch_size if max_rows is None else min(batch_size, max_rows - len(rows))
+        )
+        batch = cursor.fetchmany(size)
+        if not batch:
+            break
+        rows.extend(batch)
+    return rows
+
+
+def advise_sequential(file: Any) -> None:
+    """Hint the kernel that a file will be read front to back
+
+    Enlarges readahead for backup files streamed into restore tools. A no-op
+    where ``posix_fadvise`` is unavailable (Windows, macOS).
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+STDERR_TAIL_SIZE = 64 * 1024
+
+
+async def wait_with_stderr_tail(
+    process: asyncio.subprocess.Process, limit: int = STDERR_TAIL_SIZE
+) -> str:
+    """Wait for a subprocess, keeping only the last ``limit`` bytes of stderr
+
+    Draining stderr as it is written stops a verbose tool from blocking on a
+    full pipe without buffering its whole output in memory.
+    """
+    tail = bytearray()
+    while chunk := await process.stderr.read(limit):
+        tail += chunk
+        del tail[:-limit]
+    await process.wait()
+    return tail.decode(errors="replace")
+
 
 @dataclass
 class ConnectionConfig:
@@ -22,6 +127,20 @@ class ConnectionConfig:
     connection_string: Optional[str] = None
     ssh_config: Optional[Dict[str, Any]] = None
     extra: Optional[Dict[str, Any]] = None
+    cache_ttl: Optional[float] = None  # seconds; None uses the default
+    fetch_batch_size: Optional[int] = None  # rows per fetch; None uses the default
+
+    def pool_key(self) -> Tuple[Any, ...]:
+        """Settings that identify a reusable server session"""
+        return (
+            self.type,
+            self.host,
+            self.port,
+            self.database,
+            self.username,
+            self.password,
+            self.connection_string,
+        )
 
 
 class TableInfo(TypedDict):
@@ -55,11 +174,47 @@ class StorageAnalysis(TypedDict):
     lastAnalyzed: str
 
 
+class ResultRow(tuple):
+    """Query result row stored as a tuple with name-based access
+
+    All rows of a result share one column index, so a row costs a single
+    tuple instead of a dict while ``row["col"]``, ``row.get()``, ``keys()``
+    and ``dict(row)`` keep working for callers that expect mappings.
+    """
+
+    __slots__ = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self._index, self)
+
+
+def make_row_type(columns: Sequence[str]) -> Type[ResultRow]:
+    """Create a ResultRow type bound to the column names of one result"""
+    index = {name: i for i, name in enumerate(columns)}
+    return type("ResultRow", (ResultRow,), {"__slots__": (), "_index": index})
+
+
 class QueryResult(TypedDict):
     """Query execution result"""
 
     columns: List[str]
-    rows: List[Dict[str, Any]]
+    rows: List[Union[Dict[str, Any], ResultRow]]
     rowCount: int
     executionTime: int
     explainPlan: Optional[Any]
@@ -97,6 +252,12 @@ class DatabaseConnection(ABC):
     def __init__(self, config: ConnectionConfig):
         self.config = config
         self.connected = False
+        # Metadata cache used by the helpers in .cache
+        self._cache: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        # Query plans, kept apart so ad-hoc queries cannot evict metadata
+        self._plan_cache: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Any, "asyncio.Future[Any]"] = {}
+        self._connect_lock = asyncio.Lock()
 
     @abstractmethod
     async def connect(self) -> None:
@@ -118,6 +279,20 @@ class DatabaseConnection(ABC):
         """Execute a query"""
         pass
 
+    async def stream_query(
+        self, query: str, safe_mode: bool = True, batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[List[str], List[Union[Dict[str, Any], ResultRow]]]]:
+        """Yield ``(columns, rows)`` batches of a query result
+
+        Backends that can read a result incrementally override this; the
+        default runs ``execute_query`` and hands its rows out in batches.
+        """
+        result = await self.execute_query(query, safe_mode)
+        batch_size = batch_size or FETCH_BATCH_SIZE
+        rows = result["rows"]
+        for start in range(0, max(len(rows), 1), batch_size):
+            yield result["columns"], rows[start : start + batch_size]
+
     @abstractmethod
     async def get_schema(self) -> SchemaInfo:
         """Get database schema"""
@@ -133,6 +308,25 @@ class DatabaseConnection(ABC):
         """Restore a backup to the database"""
         pass
 
+    async def _ensure_connected(self) -> None:
+        """Connect on first use, opening only one client under concurrency"""
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if not self.connected:
+                await self.connect()
+
+    async def reset(self) -> None:
+        """Discard open transaction state before another caller reuses this"""
+
+    def invalidate_cache(self) -> None:
+        """Drop cached schema and storage metadata, and query plans"""
+        self._cache.clear()
+        self._plan_cache.clear()
+        # Loads already running may have read the old schema; later callers
+        # start fresh ones instead of joining them
+        self._inflight.clear()
+
     async def test_connection(self) -> bool:
         """Test database connection"""
         try:
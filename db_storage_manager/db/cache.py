@@ -0,0 +1,202 @@
+"""
+Metadata caching for database connections
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from ..config import CACHE_DIR
+
+DEFAULT_CACHE_TTL = 30  # seconds
+DEFAULT_CACHE_SIZE = 32  # entries per connection
+
+T = TypeVar("T")
+
+
+def _ttl(connection: Any, ttl: Optional[float]) -> float:
+    """Explicit TTL, else the connection's configured one, else the default"""
+    if ttl is not None:
+        return ttl
+    configured = getattr(connection.config, "cache_ttl", None)
+    return DEFAULT_CACHE_TTL if configured is None else configured
+
+
+def _single_flight_key(name: str, args: Any, kwargs: Dict[str, Any]) -> Hashable:
+    return (name, args, tuple(sorted(kwargs.items())))
+
+
+async def _join_in_flight(
+    connection: Any, key: Hashable, load: Callable[[], Awaitable[T]]
+) -> T:
+    """Await the running ``load`` for ``key``, starting it if none is running"""
+    task = connection._inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        connection._inflight[key] = task
+
+        def forget(done: "asyncio.Future[T]") -> None:
+            if connection._inflight.get(key) is done:
+                del connection._inflight[key]
+
+        task.add_done_callback(forget)
+    # A cancelled caller must not cancel the load the others are waiting on
+    return await asyncio.shield(task)
+
+
+def single_flight(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Share one in-flight call among concurrent callers with equal arguments
+
+    Callers arriving while the method is still running await the same task
+    instead of starting another scan; nothing is kept once it finishes.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> T:
+        key = _single_flight_key(name, args, kwargs)
+        return await _join_in_flight(self, key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def ttl_cache(
+    ttl: Optional[float] = None,
+    maxsize: int = DEFAULT_CACHE_SIZE,
+    store: str = "_cache",
+    key: Optional[Callable[..., Hashable]] = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Cache the result of an async connection method for ``ttl`` seconds
+
+    Entries live in the connection attribute named by ``store`` and are
+    keyed by method name and arguments, or by method name and
+    ``key(*args, **kwargs)`` when given. Concurrent misses for the same key
+    share one in-flight call, as with ``single_flight``;
+    ``invalidate_cache()`` drops all entries. ``ttl`` defaults to the
+    connection's ``config.cache_ttl`` and the least recently used entries
+    of the store are evicted beyond ``maxsize``.
+    """
+
+    def decorator(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        name = method.__name__
+
+        @functools.wraps(method)
+        async def wrapper(self, *args: Any, **kwargs: Any) -> T:
+            cache = getattr(self, store)
+            if key is None:
+                entry_key = _single_flight_key(name, args, kwargs)
+            else:
+                entry_key = (name, key(*args, **kwargs))
+            entry = cache.get(entry_key)
+            if entry is not None and entry[0] > time.monotonic():
+                cache.move_to_end(entry_key)
+                return entry[1]
+
+            async def load() -> T:
+                result = await method(self, *args, **kwargs)
+                # Skip storing if invalidate_cache() ran while loading
+                if self._inflight.get(entry_key) is asyncio.current_task():
+                    cache[entry_key] = (time.monotonic() + _ttl(self, ttl), result)
+                    cache.move_to_end(entry_key)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+                return result
+
+            return await _join_in_flight(self, entry_key, load)
+
+        return wrapper
+
+    return decorator
+
+
+class ReflectionCache:
+    """Metadata pickled to disk, valid while the schema token is unchanged
+
+    One file per database, so a restarted app can show schema and storage
+    without querying the catalog again. All entries are dropped when the
+    caller presents a different token; ``max_age`` additionally bounds
+    entries that go stale without DDL, such as sizes and row counts.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._token: Any = None
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    @classmethod
+    def for_database(cls, *settings: Any) -> "ReflectionCache":
+        """Cache stored under a hash of the settings naming the database"""
+        digest = hashlib.sha256(repr(settings).encode()).hexdigest()
+        return cls(CACHE_DIR / f"{digest}.pkl")
+
+    def get(self, name: str, token: Any, max_age: Optional[float] = None) -> Any:
+        """Cached value for ``name``, or None if missing, stale or outdated"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(name) if token == self._token else None
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+        return value
+
+    def put(self, name: str, token: Any, value: Any) -> None:
+        """Store ``value`` under ``token``, discarding entries for other tokens"""
+        with self._lock:
+            self._load()
+            if token != self._token:
+                self._token, self._entries = token, {}
+            self._entries[name] = (time.time(), value)
+            self._save()
+
+    def clear(self) -> None:
+        """Drop every entry and remove the file"""
+        with self._lock:
+            self._loaded, self._token, self._entries = True, None, {}
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as file:
+                self._token, self._entries = pickle.load(file)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Unreadable or from an incompatible version; start over
+            self._token, self._entries = None, {}
+
+    def _save(self) -> None:
+        # The cache is an optimisation; failing to write it is not an error
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(
+                    (self._token, self._entries), file, pickle.HIGHEST_PROTOCOL
+                )
+            # Readers in other processes see the old file or the new one
+            os.replace(temp, self.path)
+        except OSError:
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
@@ -3,20 +3,48 @@ ClickHouse database connection
 """
 
 import asyncio
-from typing import Any, Dict, List
+import datetime
+import decimal
+import ipaddress
+import json
+import uuid
+from itertools import islice
+from typing import IO, Any, Callable, Dict, List, Optional
 
 try:
     from clickhouse_driver import Client
 except ImportError:
     Client = None
 
+try:
+    import lz4  # noqa: F401
+    import clickhouse_cityhash  # noqa: F401
+
+    _COMPRESSION = "lz4"
+except ImportError:
+    _COMPRESSION = False
+
 from .base import (
     DatabaseConnection,
     ConnectionConfig,
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    is_ddl_query,
+    is_select_query,
+    make_row_type,
 )
+from .cache import ttl_cache
+
+# Rows per native INSERT block written to / replayed from a backup
+_INSERT_BLOCK_SIZE = 100_000
+
+
+# Write buffer for backup files, so each block reaches disk in few syscalls
+_BACKUP_BUFFER_SIZE = 1 << 20
+
+# Rows per block streamed back by the server for SELECTs
+_MAX_BLOCK_SIZE = 65536
 
 
 class ClickHouseConnection(DatabaseConnection):
@@ -38,6 +66,8 @@ class ClickHouseConnection(DatabaseConnection):
             database=self.config.database or "default",
             user=self.config.username or "default",
             password=self.config.password or "",
+            compression=_COMPRESSION,
+            settings={"max_block_size": _MAX_BLOCK_SIZE},
         )
         self.connected = True
 
@@ -48,10 +78,10 @@ class ClickHouseConnection(DatabaseConnection):
             self.client = None
         self.connected = False
 
+    @ttl_cache()
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze ClickHouse storage"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # Get table sizes
         result = self.client.execute(
@@ -83,8 +113,9 @@ class ClickHouseConnection(DatabaseConnection):
             )
             total_size += table_size
 
+        # system.parts is ordered by size, so the first table is the largest
         largest_table = (
-            max(tables, key=lambda t: t["size"])
+            tables[0]
             if tables
             else {"name": "", "size": 0, "rowCount": 0, "indexSize": 0, "bloat": 0.0}
         )
@@ -100,19 +131,19 @@ class ClickHouseConnection(DatabaseConnection):
 
     async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
         """Execute query on ClickHouse database"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+        if safe_mode and not is_select_query(query):
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
         result = self.client.execute(query, with_column_types=True)
+        if is_ddl_query(query):
+            self.invalidate_cache()
 
         if result:
             columns = [col[0] for col in result[1]]
-            rows = []
-            for row in result[0]:
-                rows.append(dict(zip(columns, row)))
+            row_type = make_row_type(columns)
+            rows = list(map(row_type, result[0]))
             return {
                 "columns": columns,
                 "rows": rows,
@@ -125,10 +156,10 @@ class ClickHouseConnection(DatabaseConnection):
                 "rowCount": 0,
             }
 
+    @ttl_cache()
     async def get_schema(self) -> SchemaInfo:
         """Get ClickHouse database schema"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # Get tables
         result = self.client.execute(
@@ -151,41 +182,99 @@ class ClickHouseConnection(DatabaseConnection):
         """Test ClickHouse connection"""
         try:
             await self.connect()
-            self.client.execute("SELECT 1")
+            # Native Ping/Pong packet; no query is parsed or planned
+            connection = self.client.connection
+            connection.force_connect()
+            alive = connection.ping()
             await self.disconnect()
-            return True
+            return alive
         except Exception:
             return False
 
     async def create_backup(self, backup_path: str) -> str:
-        """Create ClickHouse backup"""
-        import subprocess
+        """Create ClickHouse backup
 
-        if not self.client:
-            await self.connect()
+        The backup is JSON Lines: one ``ddl`` record per table, carrying its
+        column types, followed by ``rows`` records of up to
+        _INSERT_BLOCK_SIZE rows each, so restore can replay data through the
+        driver's native columnar INSERT instead of re-parsing one
+        ``INSERT ... VALUES`` per row.
+        """
+        await self._ensure_connected()
 
-        # Use clickhouse-backup or clickhouse-client for backup
-        backup_file = f"{backup_path}.sql"
+        backup_file = f"{backup_path}.jsonl"
 
-        # Export schema and data
         tables = await self.get_schema()
-        with open(backup_file, "w") as f:
-            for table in tables["tables"]:
-                result = self.client.execute(f"SHOW CREATE TABLE {table}")
-                f.write(f"{result[0][0]};\n")
-                # Export data
-                data = self.client.execute(f"SELECT * FROM {table}")
-                for row in data:
-                    f.write(f"INSERT INTO {table} VALUES {row};\n")
+        # Driver reads and file writes both block; keep them off the loop
+        await asyncio.to_thread(self._write_backup, backup_file, tables["tables"])
 
         return backup_file
 
+    def _write_backup(self, backup_file: str, tables: List[str]) -> None:
+        """Write DDL and row blocks for each table to the backup file"""
+        with open(
+            backup_file, "w", encoding="utf-8", buffering=_BACKUP_BUFFER_SIZE
+        ) as f:
+            for table in tables:
+                result = self.client.execute(f"SHOW CREATE TABLE {table}")
+                _, columns = self.client.execute(
+                    f"SELECT * FROM {table} LIMIT 0", with_column_types=True
+                )
+                _write_record(
+                    f,
+                    {
+                        "kind": "ddl",
+                        "table": table,
+                        "sql": result[0][0],
+                        "columns": [list(column) for column in columns],
+                    },
+                )
+                # Stream data in insert-sized blocks, one record per block
+                rows = self.client.execute_iter(f"SELECT * FROM {table}")
+                while True:
+                    block = list(islice(rows, _INSERT_BLOCK_SIZE))
+                    if not block:
+                        break
+                    _write_record(f, {"kind": "rows", "table": table, "rows": block})
+
     async def restore_backup(self, backup_path: str) -> None:
-        """Restore ClickHouse backup"""
-        if not self.client:
-            await self.connect()
+        """Restore ClickHouse backup
+
+        The format is detected from the file's content, since backups
+        fetched from cloud storage lose their original extension.
+        """
+        await self._ensure_connected()
+
+        try:
+            # File reads and inserts both block; keep them off the loop
+            if _is_jsonl_backup(backup_path):
+                await asyncio.to_thread(self._restore_jsonl, backup_path)
+            else:
+                await asyncio.to_thread(self._restore_sql_script, backup_path)
+        finally:
+            self.invalidate_cache()
 
-        # Read and execute backup file
+    def _restore_jsonl(self, backup_path: str) -> None:
+        """Replay a JSON Lines backup through native block inserts"""
+        decode_row = None
+        with open(backup_path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["kind"] == "ddl":
+                    self.client.execute(record["sql"])
+                    decode_row = _row_decoder(
+                        [column_type for _, column_type in record["columns"]]
+                    )
+                    continue
+                rows = record["rows"]
+                if decode_row is not None:
+                    rows = list(map(decode_row, rows))
+                self.client.execute(
+                    f"INSERT INTO {record['table']} VALUES", rows, types_check=False
+                )
+
+    def _restore_sql_script(self, backup_path: str) -> None:
+        """Replay a legacy statement-per-line ``.sql`` backup"""
         with open(backup_path, "r") as f:
             query = ""
             for line in f:
@@ -193,3 +282,112 @@ class ClickHouseConnection(DatabaseConnection):
                 if line.strip().endswith(";"):
                     self.client.execute(query)
                     query = ""
+
+
+def _write_record(f: IO[str], record: Dict[str, Any]) -> None:
+    f.write(json.dumps(record, default=_json_default))
+    f.write("\n")
+
+
+def _json_default(value: Any) -> Any:
+    """JSON form of driver values json cannot encode; see _decoder"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(
+        value,
+        (decimal.Decimal, uuid.UUID, ipaddress.IPv4Address, ipaddress.IPv6Address),
+    ):
+        return str(value)
+    raise TypeError(f"Cannot back up value of type {type(value).__name__}")
+
+
+def _is_jsonl_backup(backup_path: str) -> bool:
+    """Tell a JSON Lines backup from a legacy SQL script by its first byte"""
+    with open(backup_path, "rb") as f:
+        head = f.read(64).lstrip()
+    return head.startswith(b"{")
+
+
+def _row_decoder(
+    column_types: List[str],
+) -> Optional[Callable[[List[Any]], List[Any]]]:
+    """Function restoring driver values in a backed-up row, or None if none"""
+    decoders = [_decoder(column_type) for column_type in column_types]
+    if not any(decoders):
+        return None
+    return lambda row: [
+        value if decode is None or value is None else decode(value)
+        for decode, value in zip(decoders, row)
+    ]
+
+
+def _decoder(type_name: str) -> Optional[Callable[[Any], Any]]:
+    """Function turning a JSON value back into the driver's type, or None"""
+    name, _, args = type_name.strip().partition("(")
+    args = args[:-1]
+    if name in ("Nullable", "LowCardinality"):
+        inner = _decoder(args)
+        return None if inner is None else lambda v: None if v is None else inner(v)
+    if name == "Array":
+        inner = _decoder(args)
+        return None if inner is None else lambda v: [inner(item) for item in v]
+    if name == "Tuple":
+        elements = [_decoder(_element_type(arg)) for arg in _split_type_args(args)]
+        return lambda v: tuple(
+            item if decode is None or item is None else decode(item)
+            for decode, item in zip(elements, v)
+        )
+    if name == "Map":
+        key_type, value_type = _split_type_args(args)
+        decode_key = _map_key_decoder(key_type)
+        decode_value = _decoder(value_type) or (lambda v: v)
+        return lambda v: {
+            decode_key(key): None if item is None else decode_value(item)
+            for key, item in v.items()
+        }
+    if name in ("DateTime", "DateTime64"):
+        return datetime.datetime.fromisoformat
+    if name in ("Date", "Date32"):
+        return datetime.date.fromisoformat
+    if name.startswith("Decimal"):
+        return decimal.Decimal
+    if name == "UUID":
+        return uuid.UUID
+    if name == "IPv4":
+        return ipaddress.IPv4Address
+    if name == "IPv6":
+        return ipaddress.IPv6Address
+    return None
+
+
+def _map_key_decoder(type_name: str) -> Callable[[str], Any]:
+    """JSON object keys are strings; turn them back into the key type"""
+    name, _, args = type_name.strip().partition("(")
+    if name == "LowCardinality":
+        return _map_key_decoder(args[:-1])
+    if name.startswith(("Int", "UInt")):
+        return int
+    if name.startswith("Float"):
+        return float
+    return _decoder(type_name) or (lambda key: key)
+
+
+def _split_type_args(args: str) -> List[str]:
+    """Split type arguments on the commas not nested in parentheses"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(args):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(args[start:i])
+            start = i + 1
+    parts.append(args[start:])
+    return [part.strip() for part in parts]
+
+
+def _element_type(element: str) -> str:
+    """Type of a Tuple element, dropping the name of a named element"""
+    head = element.split("(", 1)[0]
+    return element.split(None, 1)[1] if len(head.split()) > 1 else element
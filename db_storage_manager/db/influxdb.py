@@ -3,7 +3,7 @@ InfluxDB database connection
 """
 
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 try:
     from influxdb_client import InfluxDBClient, Point
@@ -17,7 +17,41 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    make_row_type,
 )
+from .cache import ttl_cache
+
+# Rough per-point size used when storage metrics are unavailable
+_ESTIMATED_POINT_SIZE = 100
+
+# Write buffer for backup files, so rows reach disk in few syscalls
+_BACKUP_BUFFER_SIZE = 1 << 20
+
+# Flux queries are constant text; values are bound through query params so
+# names never need escaping and the server sees the same query every call
+_FLUX_MEASUREMENT_COUNTS = """
+from(bucket: params.bucket)
+    |> range(start: -30d)
+    |> group(columns: ["_measurement"])
+    |> count()
+"""
+
+_FLUX_BUCKET_BYTES = """
+from(bucket: "_monitoring")
+    |> range(start: -1h)
+    |> filter(fn: (r) => r._measurement == "storage_usage_bucket_bytes" and r.bucket == params.bucketID)
+    |> last()
+"""
+
+_FLUX_MEASUREMENTS = """
+import "influxdata/influxdb/schema"
+schema.measurements(bucket: params.bucket)
+"""
+
+_FLUX_EXPORT = """
+from(bucket: params.bucket)
+    |> range(start: -365d)
+"""
 
 
 class InfluxDBConnection(DatabaseConnection):
@@ -57,71 +91,47 @@ class InfluxDBConnection(DatabaseConnection):
             self.query_api = None
         self.connected = False
 
+    @ttl_cache()
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze InfluxDB storage"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
-        # Get bucket sizes (InfluxDB 2.x)
-        query = f"""
-        from(bucket: "{self.config.database}")
-            |> range(start: -30d)
-            |> group()
-            |> count()
-        """
+        # Point counts for every measurement in a single round trip
+        result = self.query_api.query(
+            _FLUX_MEASUREMENT_COUNTS, params={"bucket": self.config.database}
+        )
 
-        result = self.query_api.query(query)
+        counts = {}
+        for table in result:
+            for record in table.records:
+                measurement = record.get_measurement()
+                counts[measurement] = counts.get(measurement, 0) + record.get_value()
+
+        total_count = sum(counts.values())
+        bucket_size = self._bucket_storage_bytes()
+        if bucket_size is None:
+            # Storage metrics unavailable; fall back to a per-point estimate
+            bucket_size = total_count * _ESTIMATED_POINT_SIZE
 
         tables = []
         total_size = 0
-        row_count = 0
-
-        # Get measurements (tables)
-        query_measurements = f"""
-        import "influxdata/influxdb/schema"
-        schema.measurements(bucket: "{self.config.database}")
-        """
-
-        measurements_result = self.query_api.query(query_measurements)
-        measurements = []
-        for table in measurements_result:
-            for record in table.records:
-                measurements.append(record.get_value())
-
-        for measurement in measurements:
-            # Get size estimate for each measurement
-            query_size = f"""
-            from(bucket: "{self.config.database}")
-                |> range(start: -30d)
-                |> filter(fn: (r) => r["_measurement"] == "{measurement}")
-                |> group()
-                |> count()
-            """
-            size_result = self.query_api.query(query_size)
-            size = 0
-            count = 0
-            for table in size_result:
-                for record in table.records:
-                    count = record.get_value()
-                    size = count * 100  # Estimate: ~100 bytes per record
-
-            tables.append(
-                {
-                    "name": measurement,
-                    "size": size,
-                    "rowCount": count,
-                    "indexSize": 0,
-                    "bloat": 0.0,
-                }
-            )
+        largest_table = {"name": "", "size": 0, "rowCount": 0, "indexSize": 0, "bloat": 0.0}
+        largest_size = -1
+        for measurement, count in counts.items():
+            # Attribute on-disk bucket bytes proportionally to point counts
+            size = bucket_size * count // total_count if total_count else 0
+            entry = {
+                "name": measurement,
+                "size": size,
+                "rowCount": count,
+                "indexSize": 0,
+                "bloat": 0.0,
+            }
+            tables.append(entry)
             total_size += size
-            row_count += count
-
-        largest_table = (
-            max(tables, key=lambda t: t["size"])
-            if tables
-            else {"name": "", "size": 0, "rowCount": 0, "indexSize": 0, "bloat": 0.0}
-        )
+            if size > largest_size:
+                largest_size = size
+                largest_table = entry
 
         return {
             "totalSize": total_size,
@@ -132,26 +142,44 @@ class InfluxDBConnection(DatabaseConnection):
             "indexes": [],
         }
 
+    def _bucket_storage_bytes(self) -> Optional[int]:
+        """Read the bucket's on-disk size from the _monitoring bucket"""
+        # Tokens without bucket or _monitoring read access get the estimate
+        try:
+            bucket = self.client.buckets_api().find_bucket_by_name(
+                self.config.database
+            )
+            if bucket is None:
+                return None
+            result = self.query_api.query(
+                _FLUX_BUCKET_BYTES, params={"bucketID": bucket.id}
+            )
+        except Exception:
+            return None
+
+        for table in result:
+            for record in table.records:
+                return int(record.get_value())
+        return None
+
     async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
         """Execute query on InfluxDB database"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # InfluxDB uses Flux language, not SQL
         result = self.query_api.query(query)
 
         columns = []
         rows = []
+        row_type = None
 
         for table in result:
             if not columns:
-                columns = [col for col in table.columns.keys()]
+                columns = [col.label for col in table.columns]
+                row_type = make_row_type(columns)
 
             for record in table.records:
-                row = {}
-                for col in columns:
-                    row[col] = record.get_value_by_key(col)
-                rows.append(row)
+                rows.append(row_type(map(record.values.get, columns)))
 
         return {
             "columns": columns if columns else ["_time", "_value"],
@@ -159,18 +187,15 @@ class InfluxDBConnection(DatabaseConnection):
             "rowCount": len(rows),
         }
 
+    @ttl_cache()
     async def get_schema(self) -> SchemaInfo:
         """Get InfluxDB database schema"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # Get measurements (tables)
-        query = f"""
-        import "influxdata/influxdb/schema"
-        schema.measurements(bucket: "{self.config.database}")
-        """
-
-        result = self.query_api.query(query)
+        result = self.query_api.query(
+            _FLUX_MEASUREMENTS, params={"bucket": self.config.database}
+        )
         tables = []
         for table in result:
             for record in table.records:
@@ -186,46 +211,39 @@ class InfluxDBConnection(DatabaseConnection):
         """Test InfluxDB connection"""
         try:
             await self.connect()
-            # Test query
-            query = f'from(bucket: "{self.config.database}") |> range(start: -1h) |> limit(n: 1)'
-            self.query_api.query(query)
+            # /ping endpoint; does not start the query engine
+            alive = self.client.ping()
             await self.disconnect()
-            return True
+            return alive
         except Exception:
             return False
 
     async def create_backup(self, backup_path: str) -> str:
         """Create InfluxDB backup"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # Export all data from bucket
         backup_file = f"{backup_path}.csv"
 
-        query = f"""
-        from(bucket: "{self.config.database}")
-            |> range(start: -365d)
-            |> to(bucket: "backup-{self.config.database}", org: "{self.config.extra.get('org', 'my-org') if self.config.extra else 'my-org'}")
-        """
+        # Query streaming and file writes both block; keep them off the loop
+        await asyncio.to_thread(self._write_backup, backup_file)
 
-        # For file backup, we'll export to CSV
-        query_export = f"""
-        from(bucket: "{self.config.database}")
-            |> range(start: -365d)
-        """
+        return backup_file
 
-        result = self.query_api.query_csv(query_export)
+    def _write_backup(self, backup_file: str) -> None:
+        """Export the bucket to a CSV file"""
+        import csv
 
-        with open(backup_file, "w") as f:
-            for line in result:
-                f.write(line)
+        result = self.query_api.query_csv(
+            _FLUX_EXPORT, params={"bucket": self.config.database}
+        )
 
-        return backup_file
+        with open(backup_file, "w", newline="", buffering=_BACKUP_BUFFER_SIZE) as f:
+            csv.writer(f).writerows(result)
 
     async def restore_backup(self, backup_path: str) -> None:
         """Restore InfluxDB backup"""
-        if not self.client:
-            await self.connect()
+        await self._ensure_connected()
 
         # Read CSV and write back to InfluxDB
         import csv
@@ -244,3 +262,6 @@ class InfluxDBConnection(DatabaseConnection):
                 points.append(point)
 
             self.write_api.write(bucket=self.config.database, record=points)
+
+        # Restored points may introduce new measurements
+        self.invalidate_cache()
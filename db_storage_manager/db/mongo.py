@@ -3,12 +3,16 @@ MongoDB database connection
 """
 
 import asyncio
+import atexit
+import os
+import shutil
 import subprocess
 import tarfile
 import tempfile
+import weakref
 from pathlib import Path
 from typing import Any, Dict, List
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
 
 from .base import (
@@ -17,7 +21,44 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    advise_sequential,
 )
+from .cache import ttl_cache
+
+# Clients kept open for reuse; Motor clients are bound to the event loop they
+# were created on, so each loop gets its own set, keyed by connection URI
+_CLIENTS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+_MAX_POOL_SIZE = 50
+
+# Documents sampled per collection when inferring its fields
+_SCHEMA_SAMPLE_SIZE = 50
+
+
+def _close_clients(clients: Dict[str, Any]) -> None:
+    for client in clients.values():
+        client.close()
+    clients.clear()
+
+
+@atexit.register
+def _close_all_clients() -> None:
+    for clients in list(_CLIENTS.values()):
+        _close_clients(clients)
+
+
+def _get_client(uri: str) -> AsyncIOMotorClient:
+    """Return the shared client for ``uri`` on the running loop"""
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.get(loop)
+    if clients is None:
+        clients = _CLIENTS[loop] = {}
+        # Close the loop's clients once the loop itself goes away
+        weakref.finalize(loop, _close_clients, clients)
+    client = clients.get(uri)
+    if client is None:
+        client = clients[uri] = AsyncIOMotorClient(uri, maxPoolSize=_MAX_POOL_SIZE)
+    return client
 
 
 class MongoDBConnection(DatabaseConnection):
@@ -31,37 +72,41 @@ class MongoDBConnection(DatabaseConnection):
     async def connect(self) -> None:
         """Connect to MongoDB database"""
         if self.config.connection_string:
-            self.client = MongoClient(self.config.connection_string)
+            self.client = _get_client(self.config.connection_string)
         else:
             connection_uri = f"mongodb://{self.config.username}:{self.config.password}@{self.config.host or 'localhost'}:{self.config.port or 27017}/{self.config.database}"
-            self.client = MongoClient(connection_uri)
+            self.client = _get_client(connection_uri)
 
         # Test connection
-        self.client.admin.command("ping")
+        await self.client.admin.command("ping")
         self.db = self.client[self.config.database or "admin"]
         self.connected = True
 
     async def disconnect(self) -> None:
         """Disconnect from MongoDB database"""
         if self.client:
-            self.client.close()
+            # The shared client stays open for the next connection
             self.client = None
             self.db = None
         self.connected = False
 
+    @ttl_cache()
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze MongoDB storage"""
-        if not self.db:
-            await self.connect()
+        await self._ensure_connected()
 
-        collections = self.db.list_collection_names()
+        collections = await self.db.list_collection_names()
         tables = []
+        indexes = []
         total_size = 0
 
-        for collection_name in collections:
-            collection = self.db[collection_name]
-            stats = self.db.command("collStats", collection_name)
+        # One collStats per collection, issued concurrently; its indexSizes
+        # also names every index, so no separate listIndexes round trip
+        all_stats = await asyncio.gather(
+            *(self.db.command("collStats", name) for name in collections)
+        )
 
+        for collection_name, stats in zip(collections, all_stats):
             table_size = stats.get("size", 0)
             index_size = stats.get("totalIndexSize", 0)
             row_count = stats.get("count", 0)
@@ -77,25 +122,19 @@ class MongoDBConnection(DatabaseConnection):
             )
             total_size += table_size + index_size
 
-        # Sort by size
-        tables.sort(key=lambda x: x["size"], reverse=True)
-
-        # Get indexes
-        indexes = []
-        for collection_name in collections:
-            collection = self.db[collection_name]
-            index_list = collection.list_indexes()
-
-            for index in index_list:
+            for index_name, size in stats.get("indexSizes", {}).items():
                 indexes.append(
                     {
-                        "name": index.get("name", "unnamed"),
+                        "name": index_name,
                         "tableName": collection_name,
-                        "size": 0,
+                        "size": size,
                         "bloat": 0.0,
                     }
                 )
 
+        # Sort by size
+        tables.sort(key=lambda x: x["size"], reverse=True)
+
         largest_table = (
             tables[0] if tables else {"name": "N/A", "size": 0, "rowCount": 0}
         )
@@ -112,8 +151,7 @@ class MongoDBConnection(DatabaseConnection):
 
     async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
         """Execute a MongoDB query"""
-        if not self.db:
-            await self.connect()
+        await self._ensure_connected()
 
         import time
         import json
@@ -127,12 +165,15 @@ class MongoDBConnection(DatabaseConnection):
             collection = self.db[collection_name]
 
             if "find" in query_dict:
-                result = list(collection.find(query_dict["find"]))
+                result = await collection.find(query_dict["find"]).to_list(None)
             elif "aggregate" in query_dict:
-                result = list(collection.aggregate(query_dict["aggregate"]))
+                result = await collection.aggregate(query_dict["aggregate"]).to_list(
+                    None
+                )
             else:
-                # Fallback to direct command
-                result = [self.db.command(query_dict)]
+                # Fallback to direct command; it may create or drop collections
+                result = [await self.db.command(query_dict)]
+                self.invalidate_cache()
 
             columns = list(result[0].keys()) if result else []
             rows = [dict(item) for item in result]
@@ -149,7 +190,8 @@ class MongoDBConnection(DatabaseConnection):
         except json.JSONDecodeError:
             # If not JSON, try as direct command
             try:
-                result = [self.db.command(query)]
+                result = [await self.db.command(query)]
+                self.invalidate_cache()
                 columns = list(result[0].keys()) if result else []
                 rows = [dict(item) for item in result]
 
@@ -165,33 +207,41 @@ class MongoDBConnection(DatabaseConnection):
             except Exception as e:
                 raise RuntimeError(f"Query execution failed: {str(e)}")
 
+    @ttl_cache()
     async def get_schema(self) -> SchemaInfo:
         """Get MongoDB schema"""
-        if not self.db:
-            await self.connect()
+        await self._ensure_connected()
 
-        collections = self.db.list_collection_names()
+        collections = await self.db.list_collection_names()
         tables = []
 
-        for collection_name in collections:
-            collection = self.db[collection_name]
+        # Sample documents and list indexes for every collection concurrently
+        samples, index_lists = await asyncio.gather(
+            asyncio.gather(*(self._sample_documents(name) for name in collections)),
+            asyncio.gather(
+                *(self.db[name].list_indexes().to_list(None) for name in collections)
+            ),
+        )
 
-            # Get sample document to infer schema
-            sample_doc = collection.find_one()
-            columns = []
-            if sample_doc:
-                for key, value in sample_doc.items():
-                    columns.append(
-                        {
-                            "name": key,
-                            "type": type(value).__name__,
-                            "nullable": True,
-                            "defaultValue": None,
-                        }
-                    )
+        for collection_name, documents, index_list in zip(
+            collections, samples, index_lists
+        ):
+            # Union of fields across the sample; type from the first sighting
+            fields = {}
+            for document in documents:
+                for key, value in document.items():
+                    fields.setdefault(key, type(value).__name__)
+            columns = [
+                {
+                    "name": key,
+                    "type": type_name,
+                    "nullable": True,
+                    "defaultValue": None,
+                }
+                for key, type_name in fields.items()
+            ]
 
             # Get indexes
-            index_list = collection.list_indexes()
             indexes = []
             for index in index_list:
                 indexes.append(
@@ -219,63 +269,141 @@ class MongoDBConnection(DatabaseConnection):
             ]
         }
 
+    async def _sample_documents(self, collection_name: str) -> List[Dict[str, Any]]:
+        """Draw a random sample of documents from a collection"""
+        pipeline = [{"$sample": {"size": _SCHEMA_SAMPLE_SIZE}}]
+        return await self.db[collection_name].aggregate(pipeline).to_list(
+            _SCHEMA_SAMPLE_SIZE
+        )
+
     async def create_backup(self, backup_path: str) -> Dict[str, Any]:
-        """Create MongoDB backup using mongodump"""
-        if not self.db:
-            await self.connect()
+        """Create MongoDB backup using mongodump
+
+        The dump is streamed as a gzipped ``mongodump --archive`` straight
+        into the backup file, without a temporary dump directory. When
+        ``pigz`` is installed it compresses the stream on all cores;
+        otherwise mongodump compresses it itself.
+        """
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         backup_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Create temporary directory for dump
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Build mongodump command
-            cmd = [
-                "mongodump",
-                "--host",
-                f"{self.config.host or 'localhost'}:{self.config.port or 27017}",
-                "--db",
-                self.config.database,
-                "--username",
-                self.config.username,
-                "--password",
-                self.config.password,
-                "--authenticationDatabase",
-                "admin",
-                "--out",
-                str(temp_path),
-            ]
-
-            # Run mongodump
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            stdout, stderr = await process.communicate()
+        # Build mongodump command; --archive without a value writes to stdout
+        cmd = [
+            "mongodump",
+            "--host",
+            f"{self.config.host or 'localhost'}:{self.config.port or 27017}",
+            "--db",
+            self.config.database,
+            "--username",
+            self.config.username,
+            "--password",
+            self.config.password,
+            "--authenticationDatabase",
+            "admin",
+            "--archive",
+        ]
+
+        pigz = shutil.which("pigz")
+        with open(backup_file, "wb") as out:
+            if pigz:
+                await self._dump_through_pigz(cmd, pigz, out)
+            else:
+                # Run mongodump
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    "--gzip",
+                    stdout=out,
+                    stderr=asyncio.subprocess.PIPE,
+                )
 
-            if process.returncode != 0:
-                raise RuntimeError(f"mongodump failed: {stderr.decode()}")
+                stdout, stderr = await process.communicate()
 
-            # Compress dump directory
-            with tarfile.open(backup_file, "w:gz") as tar:
-                tar.add(temp_path, arcname=".")
+                if process.returncode != 0:
+                    raise RuntimeError(f"mongodump failed: {stderr.decode()}")
 
         size = backup_file.stat().st_size
         return {"path": str(backup_file), "size": size}
 
+    async def _dump_through_pigz(self, cmd: List[str], pigz: str, out: Any) -> None:
+        """Pipe an uncompressed mongodump archive through pigz into ``out``"""
+        read_fd, write_fd = os.pipe()
+        try:
+            dump = await asyncio.create_subprocess_exec(
+                *cmd, stdout=write_fd, stderr=asyncio.subprocess.PIPE
+            )
+        finally:
+            os.close(write_fd)
+        try:
+            compress = await asyncio.create_subprocess_exec(
+                pigz, "-c", stdin=read_fd, stdout=out, stderr=asyncio.subprocess.PIPE
+            )
+        except Exception:
+            dump.kill()
+            await dump.wait()
+            raise
+        finally:
+            os.close(read_fd)
+
+        (_, dump_err), (_, compress_err) = await asyncio.gather(
+            dump.communicate(), compress.communicate()
+        )
+
+        if dump.returncode != 0:
+            raise RuntimeError(f"mongodump failed: {dump_err.decode()}")
+        if compress.returncode != 0:
+            raise RuntimeError(f"pigz failed: {compress_err.decode()}")
+
     async def restore_backup(self, backup_path: str) -> None:
         """Restore MongoDB backup using mongorestore"""
-        if not self.db:
-            await self.connect()
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         if not backup_file.exists():
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
 
+        if tarfile.is_tarfile(backup_file):
+            await self._restore_dump_directory(backup_file)
+            return
+
+        # Build mongorestore command; the archive is fed through stdin
+        cmd = [
+            "mongorestore",
+            "--host",
+            f"{self.config.host or 'localhost'}:{self.config.port or 27017}",
+            "--username",
+            self.config.username,
+            "--password",
+            self.config.password,
+            "--authenticationDatabase",
+            "admin",
+            "--nsInclude",
+            f"{self.config.database}.*",
+            "--archive",
+            "--gzip",
+        ]
+
+        # Run mongorestore
+        with open(backup_file, "rb") as archive:
+            advise_sequential(archive)
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=archive,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+
+            stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            raise RuntimeError(f"mongorestore failed: {stderr.decode()}")
+
+        # The restore may have created or dropped collections
+        self.invalidate_cache()
+
+    async def _restore_dump_directory(self, backup_file: Path) -> None:
+        """Restore a legacy backup made as a tarball of a dump directory"""
         # Create temporary directory for extraction
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
@@ -311,3 +439,6 @@ class MongoDBConnection(DatabaseConnection):
 
             if process.returncode != 0:
                 raise RuntimeError(f"mongorestore failed: {stderr.decode()}")
+
+        # The restore may have created or dropped collections
+        self.invalidate_cache()
@@ -4,9 +4,9 @@ MySQL/MariaDB database connection
 
 import asyncio
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSCursor
 
 from .base import (
     DatabaseConnection,
@@ -14,7 +14,70 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    advise_sequential,
+    fetch_rows,
+    is_ddl_query,
+    is_select_query,
+    make_row_type,
 )
+from .cache import ttl_cache
+from .pool import IdlePool
+
+# Idle connections shared by every MySQLConnection in the process
+_POOL = IdlePool()
+
+# Catalog queries, shared by every call; only the schema name is bound
+_TABLE_SIZES_SQL = """
+SELECT
+    table_schema,
+    table_name,
+    data_length + index_length as total_size,
+    data_length as table_size,
+    index_length as index_size,
+    table_rows as row_count
+FROM information_schema.tables
+WHERE table_schema = %s
+ORDER BY total_size DESC
+"""
+
+_INDEX_SIZES_SQL = """
+SELECT
+    index_name,
+    table_name,
+    SUM(index_length) as size
+FROM information_schema.statistics
+WHERE table_schema = %s
+GROUP BY index_name, table_name
+"""
+
+_COLUMNS_SQL = """
+SELECT
+    table_name,
+    column_name,
+    data_type,
+    is_nullable,
+    column_default
+FROM information_schema.columns
+WHERE table_schema = %s
+ORDER BY table_name, ordinal_position
+"""
+
+_INDEX_COLUMNS_SQL = """
+SELECT
+    table_name,
+    index_name,
+    non_unique,
+    column_name
+FROM information_schema.statistics
+WHERE table_schema = %s
+ORDER BY table_name, index_name, seq_in_index
+"""
+
+_TABLES_SQL = """
+SELECT table_name
+FROM information_schema.tables
+WHERE table_schema = %s
+"""
 
 
 class MySQLConnection(DatabaseConnection):
@@ -26,54 +89,51 @@ class MySQLConnection(DatabaseConnection):
 
     async def connect(self) -> None:
         """Connect to MySQL database"""
-        if self.config.connection_string:
-            self.connection = pymysql.connect(
-                host=self.config.host or "localhost",
-                port=self.config.port or 3306,
-                database=self.config.database,
-                user=self.config.username,
-                password=self.config.password,
-            )
-        else:
-            self.connection = pymysql.connect(
-                host=self.config.host or "localhost",
-                port=self.config.port or 3306,
-                database=self.config.database,
-                user=self.config.username,
-                password=self.config.password,
-            )
+        self.connection = _POOL.acquire(
+            self.config.pool_key(), self._open, lambda conn: conn.ping(reconnect=False)
+        )
         self.connected = True
 
+    def _open(self):
+        """Open a new server connection"""
+        return pymysql.connect(
+            host=self.config.host or "localhost",
+            port=self.config.port or 3306,
+            database=self.config.database,
+            user=self.config.username,
+            password=self.config.password,
+        )
+
     async def disconnect(self) -> None:
         """Disconnect from MySQL database"""
         if self.connection:
-            self.connection.close()
+            _POOL.release(self.config.pool_key(), self.connection)
             self.connection = None
         self.connected = False
 
+    def _discard_connection(self) -> None:
+        """Close the server connection instead of returning it to the pool"""
+        connection, self.connection = self.connection, None
+        self.connected = False
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    async def reset(self) -> None:
+        """End the open transaction, releasing its locks and read snapshot"""
+        if self.connection:
+            self.connection.rollback()
+
+    @ttl_cache()
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze MySQL storage"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         cursor = self.connection.cursor(DictCursor)
 
         # Get table sizes
-        cursor.execute(
-            """
-            SELECT 
-                table_schema,
-                table_name,
-                data_length + index_length as total_size,
-                data_length as table_size,
-                index_length as index_size,
-                table_rows as row_count
-            FROM information_schema.tables
-            WHERE table_schema = %s
-            ORDER BY total_size DESC
-        """,
-            (self.config.database,),
-        )
+        cursor.execute(_TABLE_SIZES_SQL, (self.config.database,))
 
         tables = []
         total_size = 0
@@ -95,18 +155,7 @@ class MySQLConnection(DatabaseConnection):
             total_size += int(row["total_size"] or 0)
 
         # Get indexes
-        cursor.execute(
-            """
-            SELECT 
-                index_name,
-                table_name,
-                SUM(index_length) as size
-            FROM information_schema.statistics
-            WHERE table_schema = %s
-            GROUP BY index_name, table_name
-        """,
-            (self.config.database,),
-        )
+        cursor.execute(_INDEX_SIZES_SQL, (self.config.database,))
 
         indexes = []
         for row in cursor.fetchall():
@@ -133,127 +182,118 @@ class MySQLConnection(DatabaseConnection):
             "lastAnalyzed": __import__("datetime").datetime.now().isoformat(),
         }
 
-    async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
-        """Execute a MySQL query"""
-        if not self.connection:
-            await self.connect()
-
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+    async def execute_query(
+        self,
+        query: str,
+        safe_mode: bool = True,
+        max_rows: Optional[int] = None,
+        explain: bool = False,
+    ) -> QueryResult:
+        """Execute a MySQL query, returning at most ``max_rows`` rows
+
+        The EXPLAIN plan costs a second round trip, so it is only fetched
+        when ``explain`` is set.
+        """
+        await self._ensure_connected()
+
+        is_select = is_select_query(query)
+        if safe_mode and not is_select:
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
-        cursor = self.connection.cursor(DictCursor)
+        # Unbuffered cursor: rows are streamed from the server in batches
+        # instead of being read into client memory all at once
+        cursor = self.connection.cursor(SSCursor)
         import time
 
         start_time = time.time()
 
+        unread = False
         try:
             cursor.execute(query)
+            if is_ddl_query(query):
+                self.invalidate_cache()
             if cursor.description:
                 columns = [desc[0] for desc in cursor.description]
-                rows = [dict(row) for row in cursor.fetchall()]
+                # Plain tuple rows sharing one column index, not a dict each
+                row_type = make_row_type(columns)
+                rows = list(map(row_type, fetch_rows(cursor, max_rows)))
+                unread = len(rows) == max_rows and cursor.fetchone() is not None
             else:
                 columns = ["affected_rows"]
                 rows = [{"affected_rows": cursor.rowcount}]
 
             execution_time = int((time.time() - start_time) * 1000)
-
-            # Get explain plan for SELECT queries
-            explain_plan = None
-            if query.strip().upper().startswith("SELECT"):
-                try:
-                    cursor.execute(f"EXPLAIN {query}")
-                    explain_plan = [dict(row) for row in cursor.fetchall()]
-                except Exception:
-                    pass
-
-            return {
-                "columns": columns,
-                "rows": rows,
-                "rowCount": len(rows),
-                "executionTime": execution_time,
-                "explainPlan": explain_plan,
-            }
         finally:
-            cursor.close()
+            if unread:
+                # Closing the cursor would read every row past max_rows off
+                # the wire; closing the connection stops the query instead
+                self._discard_connection()
+            else:
+                cursor.close()
+
+        # Get explain plan for SELECT queries when requested
+        explain_plan = None
+        if explain and is_select:
+            try:
+                await self._ensure_connected()
+                with self.connection.cursor(DictCursor) as explain_cursor:
+                    explain_cursor.execute(f"EXPLAIN {query}")
+                    explain_plan = [dict(row) for row in explain_cursor.fetchall()]
+            except Exception:
+                pass
+
+        return {
+            "columns": columns,
+            "rows": rows,
+            "rowCount": len(rows),
+            "executionTime": execution_time,
+            "explainPlan": explain_plan,
+        }
 
+    @ttl_cache()
     async def get_schema(self) -> SchemaInfo:
         """Get MySQL schema"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         cursor = self.connection.cursor(DictCursor)
 
+        # Columns and indexes for every table in two catalog queries
+        cursor.execute(_COLUMNS_SQL, (self.config.database,))
+        columns_by_table = {}
+        for col in cursor.fetchall():
+            columns_by_table.setdefault(col["table_name"], []).append(
+                {
+                    "name": col["column_name"],
+                    "type": col["data_type"],
+                    "nullable": col["is_nullable"] == "YES",
+                    "defaultValue": col["column_default"],
+                }
+            )
+
+        cursor.execute(_INDEX_COLUMNS_SQL, (self.config.database,))
+        indexes_by_table = {}
+        for idx in cursor.fetchall():
+            indexes_dict = indexes_by_table.setdefault(idx["table_name"], {})
+            idx_name = idx["index_name"]
+            if idx_name not in indexes_dict:
+                indexes_dict[idx_name] = {
+                    "name": idx_name,
+                    "columns": [],
+                    "unique": idx["non_unique"] == 0,
+                }
+            indexes_dict[idx_name]["columns"].append(idx["column_name"])
+
         # Get tables
-        cursor.execute(
-            """
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = %s
-        """,
-            (self.config.database,),
-        )
+        cursor.execute(_TABLES_SQL, (self.config.database,))
 
         tables = []
         for table_row in cursor.fetchall():
             table_name = table_row["table_name"]
-
-            # Get columns
-            cursor.execute(
-                """
-                SELECT 
-                    column_name,
-                    data_type,
-                    is_nullable,
-                    column_default
-                FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-                ORDER BY ordinal_position
-            """,
-                (self.config.database, table_name),
-            )
-
-            columns = []
-            for col in cursor.fetchall():
-                columns.append(
-                    {
-                        "name": col["column_name"],
-                        "type": col["data_type"],
-                        "nullable": col["is_nullable"] == "YES",
-                        "defaultValue": col["column_default"],
-                    }
-                )
-
-            # Get indexes
-            cursor.execute(
-                """
-                SELECT 
-                    index_name,
-                    non_unique,
-                    column_name
-                FROM information_schema.statistics
-                WHERE table_schema = %s AND table_name = %s
-            """,
-                (self.config.database, table_name),
-            )
-
-            indexes_dict = {}
-            for idx in cursor.fetchall():
-                idx_name = idx["index_name"]
-                if idx_name not in indexes_dict:
-                    indexes_dict[idx_name] = {
-                        "name": idx_name,
-                        "columns": [],
-                        "unique": idx["non_unique"] == 0,
-                    }
-                indexes_dict[idx_name]["columns"].append(idx["column_name"])
-
-            indexes = list(indexes_dict.values())
-
             tables.append(
                 {
                     "name": table_name,
-                    "columns": columns,
-                    "indexes": indexes,
+                    "columns": columns_by_table.get(table_name, []),
+                    "indexes": list(indexes_by_table.get(table_name, {}).values()),
                 }
             )
 
@@ -268,8 +308,7 @@ class MySQLConnection(DatabaseConnection):
 
     async def create_backup(self, backup_path: str) -> Dict[str, Any]:
         """Create MySQL backup using mysqldump"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         backup_file.parent.mkdir(parents=True, exist_ok=True)
@@ -284,34 +323,29 @@ class MySQLConnection(DatabaseConnection):
             self.config.database,
         ]
 
-        # Run mysqldump
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        # Run mysqldump, streaming its output straight into the backup file
+        with backup_file.open("wb") as out:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=out,
+                stderr=asyncio.subprocess.PIPE,
+            )
 
-        stdout, stderr = await process.communicate()
+            stdout, stderr = await process.communicate()
 
         if process.returncode != 0:
             raise RuntimeError(f"mysqldump failed: {stderr.decode()}")
 
-        # Write output to file
-        backup_file.write_bytes(stdout)
         return str(backup_file)
 
     async def restore_backup(self, backup_path: str) -> None:
         """Restore MySQL backup"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         if not backup_file.exists():
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
 
-        # Read backup file
-        backup_data = backup_file.read_bytes()
-
         # Build mysql command
         cmd = [
             "mysql",
@@ -322,15 +356,20 @@ class MySQLConnection(DatabaseConnection):
             self.config.database,
         ]
 
-        # Run mysql restore
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        # Run mysql restore, reading the backup file directly as stdin
+        with backup_file.open("rb") as backup_data:
+            advise_sequential(backup_data)
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=backup_data,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
 
-        stdout, stderr = await process.communicate(input=backup_data)
+            stdout, stderr = await process.communicate()
 
         if process.returncode != 0:
             raise RuntimeError(f"mysql restore failed: {stderr.decode()}")
+
+        # The restore may have created or dropped tables
+        self.invalidate_cache()
@@ -3,8 +3,10 @@ Oracle Database connection
 """
 
 import asyncio
+import atexit
 import os
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import cx_Oracle
@@ -17,7 +19,37 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    FETCH_BATCH_SIZE,
+    fetch_rows,
+    is_ddl_query,
+    is_select_query,
+    make_row_type,
 )
+from .cache import ttl_cache
+
+# Session pools shared by every OracleConnection in the process, keyed by
+# connection settings
+_SESSION_POOLS: Dict[Tuple[Any, ...], Any] = {}
+_SESSION_POOLS_LOCK = threading.Lock()
+
+_POOL_MIN = 2
+_POOL_MAX = 20
+_POOL_INCREMENT = 2
+
+# Connection class used to share server processes under DRCP
+_DRCP_CLASS = "DBSTORAGEMANAGER"
+
+
+@atexit.register
+def _close_session_pools() -> None:
+    with _SESSION_POOLS_LOCK:
+        pools = list(_SESSION_POOLS.values())
+        _SESSION_POOLS.clear()
+    for pool in pools:
+        try:
+            pool.close(force=True)
+        except Exception:
+            pass
 
 
 class OracleConnection(DatabaseConnection):
@@ -26,6 +58,7 @@ class OracleConnection(DatabaseConnection):
     def __init__(self, config: ConnectionConfig):
         super().__init__(config)
         self.connection = None
+        self._block_size = None
         if cx_Oracle is None:
             raise ImportError(
                 "cx_Oracle is required for Oracle support. Install it with: pip install cx_Oracle"
@@ -33,88 +66,94 @@ class OracleConnection(DatabaseConnection):
 
     async def connect(self) -> None:
         """Connect to Oracle database"""
-        if self.config.connection_string:
-            self.connection = cx_Oracle.connect(self.config.connection_string)
-        else:
-            dsn = cx_Oracle.makedsn(
-                self.config.host or "localhost",
-                self.config.port or 1521,
-                service_name=self.config.database or "ORCL",
-            )
-            self.connection = cx_Oracle.connect(
-                user=self.config.username, password=self.config.password, dsn=dsn
-            )
+        self.connection = self._acquire()
         self.connected = True
 
+    def _acquire(self):
+        """Take a session from the shared pool"""
+        return self._session_pool().acquire(
+            cclass=_DRCP_CLASS, purity=cx_Oracle.ATTR_PURITY_SELF
+        )
+
+    def _release(self, connection) -> None:
+        """Hand a session back to the shared pool"""
+        try:
+            # Never hand uncommitted work to the next user
+            connection.rollback()
+        except Exception:
+            pass
+        self._session_pool().release(connection)
+
+    def _session_pool(self):
+        """Return the session pool for this connection's settings"""
+        key = self.config.pool_key()
+        with _SESSION_POOLS_LOCK:
+            pool = _SESSION_POOLS.get(key)
+            if pool is None:
+                user, password, dsn = self._credentials()
+                pool = _SESSION_POOLS[key] = cx_Oracle.SessionPool(
+                    user=user,
+                    password=password,
+                    dsn=dsn,
+                    min=_POOL_MIN,
+                    max=_POOL_MAX,
+                    increment=_POOL_INCREMENT,
+                    getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+                    homogeneous=True,
+                    threaded=True,
+                )
+            return pool
+
+    def _credentials(self) -> Tuple[Optional[str], Optional[str], str]:
+        """Split the configuration into user, password and DSN"""
+        if self.config.connection_string:
+            credentials, _, dsn = self.config.connection_string.rpartition("@")
+            if not credentials:
+                return self.config.username, self.config.password, dsn
+            user, _, password = credentials.partition("/")
+            return user, password, dsn
+        dsn = cx_Oracle.makedsn(
+            self.config.host or "localhost",
+            self.config.port or 1521,
+            service_name=self.config.database or "ORCL",
+        )
+        return self.config.username, self.config.password, dsn
+
     async def disconnect(self) -> None:
         """Disconnect from Oracle database"""
         if self.connection:
-            self.connection.close()
+            self._release(self.connection)
             self.connection = None
         self.connected = False
 
+    async def reset(self) -> None:
+        """End the open transaction, releasing rows locked by FOR UPDATE"""
+        if self.connection:
+            self.connection.rollback()
+
+    @ttl_cache()
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze Oracle storage"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         cursor = self.connection.cursor()
 
-        # Get table sizes
-        cursor.execute(
-            """
-            SELECT 
-                owner || '.' || table_name as name,
-                num_rows as row_count,
-                blocks * (SELECT value FROM v$parameter WHERE name = 'db_block_size') as size
-            FROM all_tables
-            WHERE owner NOT IN ('SYS', 'SYSTEM', 'SYSAUX')
-            ORDER BY blocks DESC
-        """
-        )
-
-        tables = []
-        total_size = 0
-        for row in cursor.fetchall():
-            table_size = row[2] or 0
-            tables.append(
-                {
-                    "name": row[0],
-                    "size": table_size,
-                    "rowCount": row[1] or 0,
-                    "indexSize": 0,
-                    "bloat": 0.0,
-                }
-            )
-            total_size += table_size
-
-        # Get indexes
-        cursor.execute(
-            """
-            SELECT 
-                owner || '.' || index_name as name,
-                table_name,
-                leaf_blocks * (SELECT value FROM v$parameter WHERE name = 'db_block_size') as size
-            FROM all_indexes
-            WHERE owner NOT IN ('SYS', 'SYSTEM', 'SYSAUX')
-        """
-        )
+        # The block size is fixed when the database is created
+        if self._block_size is None:
+            cursor.execute("SELECT value FROM v$parameter WHERE name = 'db_block_size'")
+            self._block_size = int(cursor.fetchone()[0])
+        cursor.close()
 
-        indexes = []
-        index_total = 0
-        for row in cursor.fetchall():
-            index_size = row[2] or 0
-            indexes.append(
-                {
-                    "name": row[0],
-                    "tableName": row[1],
-                    "size": index_size,
-                    "bloat": 0.0,
-                }
+        # Tables and indexes are independent catalog scans; run them on two
+        # sessions at once so the database executes them in parallel
+        index_connection = await asyncio.to_thread(self._acquire)
+        try:
+            (tables, total_size), (indexes, index_total) = await asyncio.gather(
+                asyncio.to_thread(self._fetch_tables, self.connection),
+                asyncio.to_thread(self._fetch_indexes, index_connection),
             )
-            index_total += index_size
-
-        cursor.close()
+        finally:
+            self._release(index_connection)
 
         largest_table = (
             max(tables, key=lambda t: t["size"])
@@ -131,23 +170,95 @@ class OracleConnection(DatabaseConnection):
             "indexes": indexes,
         }
 
-    async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
-        """Execute query on Oracle database"""
-        if not self.connection:
-            await self.connect()
+    def _fetch_tables(self, connection) -> Tuple[List[Dict[str, Any]], int]:
+        """Read table sizes from the catalog"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT 
+                    owner || '.' || table_name as name,
+                    num_rows as row_count,
+                    blocks * :bs as size
+                FROM all_tables
+                WHERE owner NOT IN ('SYS', 'SYSTEM', 'SYSAUX')
+                ORDER BY blocks DESC
+            """,
+                bs=self._block_size,
+            )
+
+            tables = []
+            total_size = 0
+            for row in cursor.fetchall():
+                table_size = row[2] or 0
+                tables.append(
+                    {
+                        "name": row[0],
+                        "size": table_size,
+                        "rowCount": row[1] or 0,
+                        "indexSize": 0,
+                        "bloat": 0.0,
+                    }
+                )
+                total_size += table_size
+            return tables, total_size
+        finally:
+            cursor.close()
 
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+    def _fetch_indexes(self, connection) -> Tuple[List[Dict[str, Any]], int]:
+        """Read index sizes from the catalog"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT 
+                    owner || '.' || index_name as name,
+                    table_name,
+                    leaf_blocks * :bs as size
+                FROM all_indexes
+                WHERE owner NOT IN ('SYS', 'SYSTEM', 'SYSAUX')
+            """,
+                bs=self._block_size,
+            )
+
+            indexes = []
+            index_total = 0
+            for row in cursor.fetchall():
+                index_size = row[2] or 0
+                indexes.append(
+                    {
+                        "name": row[0],
+                        "tableName": row[1],
+                        "size": index_size,
+                        "bloat": 0.0,
+                    }
+                )
+                index_total += index_size
+            return indexes, index_total
+        finally:
+            cursor.close()
+
+    async def execute_query(
+        self, query: str, safe_mode: bool = True, max_rows: Optional[int] = None
+    ) -> QueryResult:
+        """Execute query on Oracle database, returning at most ``max_rows`` rows"""
+        await self._ensure_connected()
+
+        is_select = is_select_query(query)
+        if safe_mode and not is_select:
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
         cursor = self.connection.cursor()
+        # Fetch rows in large network round trips, starting with the execute
+        cursor.arraysize = FETCH_BATCH_SIZE
+        cursor.prefetchrows = FETCH_BATCH_SIZE
         try:
             cursor.execute(query)
 
-            if query.strip().upper().startswith("SELECT"):
+            if is_select:
                 columns = [desc[0] for desc in cursor.description]
-                rows = []
-                for row in cursor.fetchall():
-                    rows.append(dict(zip(columns, row)))
+                row_type = make_row_type(columns)
+                rows = list(map(row_type, fetch_rows(cursor, max_rows)))
                 return {
                     "columns": columns,
                     "rows": rows,
@@ -155,6 +266,8 @@ class OracleConnection(DatabaseConnection):
                 }
             else:
                 self.connection.commit()
+                if is_ddl_query(query):
+                    self.invalidate_cache()
                 return {
                     "columns": [],
                     "rows": [],
@@ -163,10 +276,10 @@ class OracleConnection(DatabaseConnection):
         finally:
             cursor.close()
 
+    @ttl_cache()
     async def get_schema(self) -> SchemaInfo:
         """Get Oracle database schema"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         cursor = self.connection.cursor()
 
@@ -211,10 +324,7 @@ class OracleConnection(DatabaseConnection):
 
     async def create_backup(self, backup_path: str) -> str:
         """Create Oracle backup using expdp"""
-        import subprocess
-
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         # Use expdp for Oracle backup
         backup_file = f"{backup_path}.dmp"
@@ -230,18 +340,20 @@ class OracleConnection(DatabaseConnection):
             "SCHEMAS=" + self.config.username,
         ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Exception(f"Oracle backup failed: {result.stderr}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise Exception(f"Oracle backup failed: {stderr.decode()}")
 
         return backup_file
 
     async def restore_backup(self, backup_path: str) -> None:
         """Restore Oracle backup using impdp"""
-        import subprocess
-
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         # Use impdp for Oracle restore
         cmd = [
@@ -252,6 +364,14 @@ class OracleConnection(DatabaseConnection):
             "SCHEMAS=" + self.config.username,
         ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Exception(f"Oracle restore failed: {result.stderr}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise Exception(f"Oracle restore failed: {stderr.decode()}")
+
+        # The restore may have created or dropped tables
+        self.invalidate_cache()
@@ -0,0 +1,205 @@
+"""
+Connection reuse across database connection objects
+"""
+
+import asyncio
+import atexit
+import contextlib
+import dataclasses
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from .base import ConnectionConfig, DatabaseConnection
+
+DEFAULT_MAX_IDLE = 5
+
+# Connected DatabaseConnection objects kept per saved connection, and the
+# most that may be in use at once
+DEFAULT_POOL_SIZE = 4
+DEFAULT_BURST_LIMIT = 8
+
+# Driver-level connections each pooled object keeps open when idle; the
+# DatabasePool already keeps several objects per saved connection
+POOLED_MIN_SIZE = 1
+
+
+class IdlePool:
+    """Process-wide store of idle DB-API connections keyed by settings
+
+    ``disconnect()`` hands its connection back instead of closing it, so the
+    next ``connect()`` with the same settings skips the TCP and auth
+    handshake. Connections are checked before reuse and any left over are
+    closed at interpreter exit.
+    """
+
+    def __init__(self, max_idle: int = DEFAULT_MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle: Dict[Hashable, List[Any]] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close_all)
+
+    def acquire(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        check: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Return an idle connection for ``key`` or create one"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                connection = idle.pop() if idle else None
+            if connection is None:
+                return factory()
+            try:
+                if check is not None:
+                    check(connection)
+                return connection
+            except Exception:
+                _close(connection)
+
+    def release(self, key: Hashable, connection: Any) -> None:
+        """Return a connection to the pool, closing it if the pool is full"""
+        try:
+            # Never hand uncommitted work to the next user
+            connection.rollback()
+        except Exception:
+            _close(connection)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        _close(connection)
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                _close(connection)
+
+
+class DatabasePool:
+    """Connected ``DatabaseConnection`` objects reused across operations
+
+    Up to ``burst_limit`` connections may be checked out at once; at most
+    ``max_size`` of them are kept connected for reuse and the rest are
+    disconnected when returned. A connection whose operation raised, or
+    that cannot be reset, is dropped rather than handed out again. All
+    members share one metadata cache and one plan cache, so DDL run through
+    any of them invalidates them for the others too.
+    """
+
+    def __init__(
+        self,
+        config: ConnectionConfig,
+        max_size: int = DEFAULT_POOL_SIZE,
+        burst_limit: int = DEFAULT_BURST_LIMIT,
+    ):
+        self.config = config
+        self.max_size = max_size
+        self._idle: List[DatabaseConnection] = []
+        self._slots = asyncio.Semaphore(burst_limit)
+        self._closed = False
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self._plan_cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self._inflight: Dict[Any, "asyncio.Future[Any]"] = {}
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> AsyncIterator[DatabaseConnection]:
+        """Borrow a connected ``DatabaseConnection`` for the block"""
+        async with self._slots:
+            db = self._idle.pop() if self._idle else await self._open()
+            try:
+                yield db
+            except BaseException:
+                await _disconnect(db)
+                raise
+            keep = not self._closed and len(self._idle) < self.max_size
+            if keep and await _reset(db):
+                self._idle.append(db)
+            else:
+                await _disconnect(db)
+
+    async def _open(self) -> DatabaseConnection:
+        # Imported here: the backends import this module for IdlePool
+        from .factory import DatabaseConnectionFactory
+
+        extra = {**(self.config.extra or {}), "pool_min_size": POOLED_MIN_SIZE}
+        db = DatabaseConnectionFactory.create_connection(
+            dataclasses.replace(self.config, extra=extra)
+        )
+        db._cache = self._cache
+        db._plan_cache = self._plan_cache
+        db._inflight = self._inflight
+        await db.connect()
+        return db
+
+    async def close(self) -> None:
+        """Disconnect every idle connection, and borrowed ones when returned"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for db in idle:
+            await _disconnect(db)
+
+
+class DatabasePools:
+    """One ``DatabasePool`` per saved connection, keyed by its id"""
+
+    def __init__(self):
+        self._pools: Dict[str, DatabasePool] = {}
+
+    async def get(self, connection: Dict[str, Any]) -> DatabasePool:
+        """Pool for a saved connection, replacing it if the settings changed"""
+        config = ConnectionConfig(**connection)
+        pool = self._pools.get(config.id)
+        if pool is None or pool.config != config:
+            # Swapped in before closing, so concurrent callers see the new one
+            old, pool = pool, DatabasePool(config)
+            self._pools[config.id] = pool
+            if old is not None:
+                await old.close()
+        return pool
+
+    @contextlib.asynccontextmanager
+    async def connection(
+        self, connection: Dict[str, Any]
+    ) -> AsyncIterator[DatabaseConnection]:
+        """Borrow a connected ``DatabaseConnection`` for a saved connection"""
+        pool = await self.get(connection)
+        async with pool.connection() as db:
+            yield db
+
+    async def discard(self, connection_id: str) -> None:
+        """Forget the pool for a connection and disconnect its idle members"""
+        pool = self._pools.pop(connection_id, None)
+        if pool is not None:
+            await pool.close()
+
+
+async def _reset(db: DatabaseConnection) -> bool:
+    """Reset a returned connection for reuse, reporting whether that worked"""
+    try:
+        await db.reset()
+        return True
+    except Exception:
+        return False
+
+
+async def _disconnect(db: DatabaseConnection) -> None:
+    try:
+        await db.disconnect()
+    except Exception:
+        pass
+
+
+def _close(connection: Any) -> None:
+    try:
+        connection.close()
+    except Exception:
+        pass
@@ -3,11 +3,12 @@ PostgreSQL database connection
 """
 
 import asyncio
-import subprocess
+import hashlib
+import json
+import os
 from pathlib import Path
-from typing import Any, Dict, List
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import Any, Dict, List, Optional, Tuple
+import asyncpg
 
 from .base import (
     DatabaseConnection,
@@ -15,7 +16,85 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    is_ddl_query,
+    is_explainable_query,
+    is_select_query,
+    normalize_query,
+    wait_with_stderr_tail,
 )
+from .cache import ttl_cache
+
+# Prepared statements kept per connection; catalog queries skip the
+# parse/plan step after their first execution
+_STATEMENT_CACHE_SIZE = 100
+
+# Connections kept open per PostgreSQLConnection; idle extras above the
+# minimum are closed after _POOL_MAX_IDLE seconds
+_POOL_MIN_SIZE = 5
+_POOL_MAX_SIZE = 20
+_POOL_MAX_IDLE = 300
+
+# EXPLAIN results kept per connection, apart from the schema and storage
+# metadata so ad-hoc queries cannot evict it
+_PLAN_CACHE_SIZE = 64
+
+# Sizes and planner row estimates for every user table in one round trip;
+# reltuples is -1 until the table is first analyzed
+_TABLE_SIZES_SQL = """
+    SELECT
+        s.schemaname || '.' || s.relname AS name,
+        s.schemaname,
+        s.relname,
+        pg_total_relation_size(s.relid) AS size,
+        pg_relation_size(s.relid) AS table_size,
+        CASE
+            WHEN c.reltuples >= 0 THEN c.reltuples::bigint
+            ELSE s.n_live_tup
+        END AS row_count
+    FROM pg_stat_user_tables s
+    JOIN pg_class c ON c.oid = s.relid
+    ORDER BY size DESC
+"""
+_INDEX_SIZES_SQL = """
+    SELECT
+        schemaname || '.' || indexrelname AS name,
+        relname AS table_name,
+        pg_relation_size(indexrelid) AS size
+    FROM pg_stat_user_indexes
+"""
+
+# Per-schema and per-table catalog queries, prepared once per get_schema call
+_TABLES_SQL = """
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_schema = $1
+"""
+_COLUMNS_SQL = """
+    SELECT column_name, data_type, is_nullable, column_default
+    FROM information_schema.columns
+    WHERE table_schema = $1 AND table_name = $2
+    ORDER BY ordinal_position
+"""
+# Index columns in key order; expression keys (attnum 0) have no column
+_INDEXES_SQL = """
+    SELECT
+        i.relname AS index_name,
+        ix.indisunique AS is_unique,
+        array_agg(a.attname ORDER BY array_position(ix.indkey::int2[], a.attnum))
+            FILTER (WHERE a.attname IS NOT NULL) AS columns
+    FROM pg_index ix
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
+    WHERE n.nspname = $1 AND t.relname = $2
+    GROUP BY i.relname, ix.indisunique
+"""
+
+
+def _plan_key(query: str) -> str:
+    """Digest of a normalized query, so plans are not keyed by long texts"""
+    return hashlib.sha256(normalize_query(query).encode()).hexdigest()
 
 
 class PostgreSQLConnection(DatabaseConnection):
@@ -23,60 +102,87 @@ class PostgreSQLConnection(DatabaseConnection):
 
     def __init__(self, config: ConnectionConfig):
         super().__init__(config)
-        self.connection = None
+        self.pool = None
+
+        # Settings with defaults applied, resolved once per connection.
+        # Without a host (or with a socket directory as host) clients use
+        # the local Unix socket, skipping TCP setup on every new connection
+        host = config.host
+        port = config.port or 5432
+        extra = config.extra or {}
+        if config.connection_string:
+            self._pool_args: Tuple[Any, ...] = (config.connection_string,)
+            self._pool_options: Dict[str, Any] = {}
+        else:
+            self._pool_args = ()
+            self._pool_options = {
+                "port": port,
+                "database": config.database,
+                "user": config.username,
+                "password": config.password,
+            }
+            if host:
+                self._pool_options["host"] = host
+        self._pool_options.update(
+            min_size=extra.get("pool_min_size", _POOL_MIN_SIZE),
+            max_size=_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=_POOL_MAX_IDLE,
+            statement_cache_size=_STATEMENT_CACHE_SIZE,
+        )
+        if extra.get("sslmode"):
+            self._pool_options["ssl"] = extra["sslmode"]
+        if extra.get("direct_tls"):
+            # TLS handshake straight away instead of an SSLRequest round
+            # trip first; needs PostgreSQL 17 or later
+            self._pool_options["direct_tls"] = True
+
+        # Shared by pg_dump and pg_restore
+        self._client_args = [
+            *(["--host", host] if host else []),
+            "--port",
+            str(port),
+            "--username",
+            config.username,
+            "--dbname",
+            config.database,
+        ]
+        self._client_env = {"PGPASSWORD": config.password} if config.password else {}
+        if extra.get("sslmode"):
+            self._client_env["PGSSLMODE"] = extra["sslmode"]
 
     async def connect(self) -> None:
         """Connect to PostgreSQL database"""
-        if self.config.connection_string:
-            self.connection = psycopg2.connect(self.config.connection_string)
-        else:
-            self.connection = psycopg2.connect(
-                host=self.config.host or "localhost",
-                port=self.config.port or 5432,
-                database=self.config.database,
-                user=self.config.username,
-                password=self.config.password,
-            )
+        self.pool = await asyncpg.create_pool(*self._pool_args, **self._pool_options)
         self.connected = True
 
     async def disconnect(self) -> None:
         """Disconnect from PostgreSQL database"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
         self.connected = False
 
-    async def analyze_storage(self) -> StorageAnalysis:
-        """Analyze PostgreSQL storage"""
-        if not self.connection:
-            await self.connect()
+    @ttl_cache()
+    async def analyze_storage(self, precise: bool = False) -> StorageAnalysis:
+        """Analyze PostgreSQL storage
 
-        cursor = self.connection.cursor(cursor_factory=RealDictCursor)
-
-        # Get table sizes
-        cursor.execute(
-            """
-            SELECT 
-                schemaname || '.' || tablename as name,
-                pg_total_relation_size(schemaname || '.' || tablename) as size,
-                pg_relation_size(schemaname || '.' || tablename) as table_size,
-                (SELECT COUNT(*) FROM information_schema.tables 
-                 WHERE table_schema = t.schemaname AND table_name = t.tablename) as row_count
-            FROM pg_tables t
-            WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
-            ORDER BY size DESC
+        Row counts are planner estimates unless ``precise`` is set, which
+        counts every table and so scans all of them.
         """
+        await self._ensure_connected()
+
+        # Table and index sizes on two pooled connections at once
+        table_rows, index_rows = await asyncio.gather(
+            self.pool.fetch(_TABLE_SIZES_SQL), self.pool.fetch(_INDEX_SIZES_SQL)
         )
+        if precise:
+            row_counts = await self._count_rows(table_rows)
+        else:
+            row_counts = [row["row_count"] or 0 for row in table_rows]
 
         tables = []
         total_size = 0
-        for row in cursor.fetchall():
-            # Get actual row count
-            cursor.execute(
-                f'SELECT COUNT(*) FROM "{row["name"].split(".")[0]}"."{row["name"].split(".")[1]}"'
-            )
-            row_count = cursor.fetchone()[0]
-
+        for row, row_count in zip(table_rows, row_counts):
             table_size = row["table_size"] or 0
             index_size = (row["size"] or 0) - table_size
 
@@ -91,20 +197,8 @@ class PostgreSQLConnection(DatabaseConnection):
             )
             total_size += row["size"] or 0
 
-        # Get indexes
-        cursor.execute(
-            """
-            SELECT 
-                schemaname || '.' || indexname as name,
-                tablename as table_name,
-                pg_relation_size(indexrelid) as size
-            FROM pg_indexes
-            WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
-        """
-        )
-
         indexes = []
-        for row in cursor.fetchall():
+        for row in index_rows:
             indexes.append(
                 {
                     "name": row["name"],
@@ -128,152 +222,172 @@ class PostgreSQLConnection(DatabaseConnection):
             "lastAnalyzed": __import__("datetime").datetime.now().isoformat(),
         }
 
-    async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
-        """Execute a PostgreSQL query"""
-        if not self.connection:
-            await self.connect()
+    async def _count_rows(self, table_rows: List[Any]) -> List[int]:
+        """Exact row counts for the given tables in a single statement"""
+        if not table_rows:
+            return []
+        count_sql = " UNION ALL ".join(
+            f"SELECT {position}, COUNT(*) FROM {_quote_identifier(row['schemaname'])}"
+            f".{_quote_identifier(row['relname'])}"
+            for position, row in enumerate(table_rows)
+        )
+        counts = dict(await self.pool.fetch(count_sql))
+        return [counts[position] for position in range(len(table_rows))]
+
+    async def execute_query(
+        self,
+        query: str,
+        safe_mode: bool = True,
+        max_rows: Optional[int] = None,
+        explain: bool = False,
+    ) -> QueryResult:
+        """Execute a PostgreSQL query, returning at most ``max_rows`` rows
+
+        The EXPLAIN plan costs a second round trip, so it is only fetched
+        when ``explain`` is set.
+        """
+        await self._ensure_connected()
 
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+        if safe_mode and not is_select_query(query):
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
-        cursor = self.connection.cursor(cursor_factory=RealDictCursor)
         import time
 
         start_time = time.time()
 
-        try:
-            cursor.execute(query)
-            if cursor.description:
-                columns = [desc[0] for desc in cursor.description]
-                rows = [dict(row) for row in cursor.fetchall()]
+        async with self.pool.acquire() as connection:
+            if is_explainable_query(query):
+                # Prepared, so the columns are known even for an empty result
+                statement = await connection.prepare(query)
+                columns = [attribute.name for attribute in statement.get_attributes()]
+                # asyncpg Records already support mapping access; no dict copy
+                if max_rows is None:
+                    rows = await statement.fetch()
+                else:
+                    # Portal-backed cursor: only max_rows leave the server
+                    async with connection.transaction():
+                        cursor = await statement.cursor()
+                        rows = await cursor.fetch(max_rows)
             else:
+                # Simple query protocol: runs scripts of several statements
+                # and statements that cannot be prepared
+                status = await connection.execute(query)
                 columns = ["affected_rows"]
-                rows = [{"affected_rows": cursor.rowcount}]
+                rows = [{"affected_rows": _affected_rows(status)}]
+                if is_ddl_query(query):
+                    self.invalidate_cache()
 
             execution_time = int((time.time() - start_time) * 1000)
 
-            # Get explain plan for SELECT queries
-            explain_plan = None
-            if query.strip().upper().startswith("SELECT"):
-                try:
-                    cursor.execute(f"EXPLAIN {query}")
-                    explain_plan = [row[0] for row in cursor.fetchall()]
-                except Exception:
-                    pass
-
-            return {
-                "columns": columns,
-                "rows": rows,
-                "rowCount": len(rows),
-                "executionTime": execution_time,
-                "explainPlan": explain_plan,
-            }
-        finally:
-            cursor.close()
-
-    async def get_schema(self) -> SchemaInfo:
-        """Get PostgreSQL schema"""
-        if not self.connection:
-            await self.connect()
+        # Get explain plan for SELECT queries when requested
+        explain_plan = None
+        if explain and is_explainable_query(query):
+            try:
+                explain_plan = await self._explain_plan(query)
+            except Exception:
+                pass
 
-        cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+        return {
+            "columns": columns,
+            "rows": rows,
+            "rowCount": len(rows),
+            "executionTime": execution_time,
+            "explainPlan": explain_plan,
+        }
 
-        # Get schemas
-        cursor.execute(
-            """
-            SELECT schema_name 
-            FROM information_schema.schemata 
-            WHERE schema_name NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
-        """
-        )
+    @ttl_cache(maxsize=_PLAN_CACHE_SIZE, store="_plan_cache", key=_plan_key)
+    async def _explain_plan(self, query: str) -> List[Dict[str, Any]]:
+        """JSON plan of a query, cached until the TTL expires or DDL runs"""
+        plan = await self.pool.fetchval(f"EXPLAIN (FORMAT JSON) {query}")
+        return json.loads(plan)
 
-        schemas = []
-        for schema_row in cursor.fetchall():
-            schema_name = schema_row["schema_name"]
+    @ttl_cache()
+    async def get_schema(self) -> SchemaInfo:
+        """Get PostgreSQL schema"""
+        await self._ensure_connected()
 
-            # Get tables
-            cursor.execute(
+        async with self.pool.acquire() as connection:
+            # Get schemas
+            schema_rows = await connection.fetch(
                 """
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = %s
-            """,
-                (schema_name,),
+                SELECT schema_name 
+                FROM information_schema.schemata 
+                WHERE schema_name NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+            """
             )
 
-            tables = []
-            for table_row in cursor.fetchall():
-                table_name = table_row["table_name"]
-
-                # Get columns
-                cursor.execute(
-                    """
-                    SELECT 
-                        column_name,
-                        data_type,
-                        is_nullable,
-                        column_default
-                    FROM information_schema.columns
-                    WHERE table_schema = %s AND table_name = %s
-                    ORDER BY ordinal_position
-                """,
-                    (schema_name, table_name),
-                )
-
-                columns = []
-                for col in cursor.fetchall():
-                    columns.append(
-                        {
-                            "name": col["column_name"],
-                            "type": col["data_type"],
-                            "nullable": col["is_nullable"] == "YES",
-                            "defaultValue": col["column_default"],
-                        }
-                    )
-
-                # Get indexes
-                cursor.execute(
-                    """
-                    SELECT 
-                        indexname,
-                        indexdef
-                    FROM pg_indexes
-                    WHERE schemaname = %s AND tablename = %s
-                """,
-                    (schema_name, table_name),
+            # Get tables
+            tables_statement = await connection.prepare(_TABLES_SQL)
+            schema_tables = []
+            for schema_row in schema_rows:
+                schema_name = schema_row["schema_name"]
+                table_rows = await tables_statement.fetch(schema_name)
+                schema_tables.append(
+                    (schema_name, [row["table_name"] for row in table_rows])
                 )
 
-                indexes = []
-                for idx in cursor.fetchall():
-                    indexes.append(
-                        {
-                            "name": idx["indexname"],
-                            "columns": [],
-                            "unique": "UNIQUE" in idx["indexdef"].upper(),
-                        }
-                    )
-
-                tables.append(
-                    {
-                        "name": table_name,
-                        "columns": columns,
-                        "indexes": indexes,
-                    }
+        # Columns and indexes for every table, fetched concurrently over
+        # pooled connections; pool size bounds the fan-out
+        table_infos = iter(
+            await asyncio.gather(
+                *(
+                    self._fetch_table_meta(schema_name, table_name)
+                    for schema_name, table_names in schema_tables
+                    for table_name in table_names
                 )
+            )
+        )
 
+        schemas = []
+        for schema_name, table_names in schema_tables:
             schemas.append(
                 {
                     "name": schema_name,
-                    "tables": tables,
+                    "tables": [next(table_infos) for _ in table_names],
                 }
             )
 
         return {"schemas": schemas}
 
+    async def _fetch_table_meta(
+        self, schema_name: str, table_name: str
+    ) -> Dict[str, Any]:
+        """Columns and indexes of one table, read on a pooled connection"""
+        async with self.pool.acquire() as connection:
+            # Repeat calls hit the connection's prepared statement cache
+            column_rows = await connection.fetch(_COLUMNS_SQL, schema_name, table_name)
+            index_rows = await connection.fetch(_INDEXES_SQL, schema_name, table_name)
+
+        columns = []
+        for col in column_rows:
+            columns.append(
+                {
+                    "name": col["column_name"],
+                    "type": col["data_type"],
+                    "nullable": col["is_nullable"] == "YES",
+                    "defaultValue": col["column_default"],
+                }
+            )
+
+        indexes = []
+        for idx in index_rows:
+            indexes.append(
+                {
+                    "name": idx["index_name"],
+                    "columns": list(idx["columns"] or []),
+                    "unique": idx["is_unique"],
+                }
+            )
+
+        return {
+            "name": table_name,
+            "columns": columns,
+            "indexes": indexes,
+        }
+
     async def create_backup(self, backup_path: str) -> Dict[str, Any]:
         """Create PostgreSQL backup using pg_dump"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         backup_file.parent.mkdir(parents=True, exist_ok=True)
@@ -281,14 +395,7 @@ class PostgreSQLConnection(DatabaseConnection):
         # Build pg_dump command
         cmd = [
             "pg_dump",
-            "--host",
-            self.config.host or "localhost",
-            "--port",
-            str(self.config.port or 5432),
-            "--username",
-            self.config.username,
-            "--dbname",
-            self.config.database,
+            *self._client_args,
             "--format",
             "c",
             "--file",
@@ -296,30 +403,27 @@ class PostgreSQLConnection(DatabaseConnection):
         ]
 
         # Set password via environment variable
-        env = __import__("os").environ.copy()
-        if self.config.password:
-            env["PGPASSWORD"] = self.config.password
+        env = {**os.environ, **self._client_env}
 
-        # Run pg_dump
+        # Run pg_dump; the archive goes to --file, so stdout is unused
         process = await asyncio.create_subprocess_exec(
             *cmd,
             env=env,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
         )
 
-        stdout, stderr = await process.communicate()
+        stderr = await wait_with_stderr_tail(process)
 
         if process.returncode != 0:
-            raise RuntimeError(f"pg_dump failed: {stderr.decode()}")
+            raise RuntimeError(f"pg_dump failed: {stderr}")
 
         size = backup_file.stat().st_size
-        return str(backup_file)
+        return {"path": str(backup_file), "size": size}
 
     async def restore_backup(self, backup_path: str) -> None:
         """Restore PostgreSQL backup using pg_restore"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
 
         backup_file = Path(backup_path)
         if not backup_file.exists():
@@ -328,33 +432,36 @@ class PostgreSQLConnection(DatabaseConnection):
         # Build pg_restore command
         cmd = [
             "pg_restore",
-            "--host",
-            self.config.host or "localhost",
-            "--port",
-            str(self.config.port or 5432),
-            "--username",
-            self.config.username,
-            "--dbname",
-            self.config.database,
+            *self._client_args,
             "--clean",
             "--if-exists",
             str(backup_file),
         ]
 
         # Set password via environment variable
-        env = __import__("os").environ.copy()
-        if self.config.password:
-            env["PGPASSWORD"] = self.config.password
+        env = {**os.environ, **self._client_env}
 
         # Run pg_restore
         process = await asyncio.create_subprocess_exec(
             *cmd,
             env=env,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
         )
 
-        stdout, stderr = await process.communicate()
+        stderr = await wait_with_stderr_tail(process)
 
         if process.returncode != 0:
-            raise RuntimeError(f"pg_restore failed: {stderr.decode()}")
+            raise RuntimeError(f"pg_restore failed: {stderr}")
+
+        self.invalidate_cache()
+
+
+def _affected_rows(status: str) -> int:
+    """Row count from a command tag such as ``UPDATE 5`` or ``INSERT 0 5``"""
+    count = (status or "").rsplit(" ", 1)[-1]
+    return int(count) if count.isdigit() else -1
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
@@ -3,10 +3,12 @@ Redis database connection
 """
 
 import asyncio
+import shutil
 import subprocess
 from pathlib import Path
-from typing import Any, Dict, List
-import redis
+from typing import Any, Dict, List, Tuple
+import redis.asyncio as aioredis
+from redis.exceptions import ResponseError
 
 from .base import (
     DatabaseConnection,
@@ -15,6 +17,22 @@ from .base import (
     QueryResult,
     SchemaInfo,
 )
+from .cache import single_flight
+
+# Keys requested per SCAN call and per pipelined TYPE/MEMORY USAGE batch
+_SCAN_COUNT = 10000
+_PIPELINE_BATCH_SIZE = 10000
+
+# Replies are decoded to str by the protocol parser; values that are not
+# valid UTF-8 keep their bytes as escapes instead of failing the command
+_DECODE_OPTIONS = {"decode_responses": True, "encoding_errors": "backslashreplace"}
+
+# Key scans keep names as bytes, so keys that are not valid UTF-8 can still
+# be passed back to TYPE and MEMORY USAGE
+_RAW_OPTIONS = {"decode_responses": False}
+
+# Seconds between INFO polls while a background save runs
+_BGSAVE_POLL_INTERVAL = 0.5
 
 
 class RedisConnection(DatabaseConnection):
@@ -23,58 +41,51 @@ class RedisConnection(DatabaseConnection):
     def __init__(self, config: ConnectionConfig):
         super().__init__(config)
         self.client = None
+        self.raw_client = None
 
     async def connect(self) -> None:
         """Connect to Redis database"""
-        if self.config.connection_string:
-            self.client = redis.from_url(self.config.connection_string)
-        else:
-            self.client = redis.Redis(
-                host=self.config.host or "localhost",
-                port=self.config.port or 6379,
-                db=int(self.config.database) if self.config.database else 0,
-                password=self.config.password,
-                decode_responses=False,
-            )
+        self.client = self._create_client(_DECODE_OPTIONS)
+        # Its pool opens a socket only once a key scan runs
+        self.raw_client = self._create_client(_RAW_OPTIONS)
 
         # Test connection
-        self.client.ping()
+        await self.client.ping()
         self.connected = True
 
+    def _create_client(self, options: Dict[str, Any]) -> aioredis.Redis:
+        """Create a client for this connection's settings"""
+        if self.config.connection_string:
+            return aioredis.from_url(self.config.connection_string, **options)
+        return aioredis.Redis(
+            host=self.config.host or "localhost",
+            port=self.config.port or 6379,
+            db=int(self.config.database) if self.config.database else 0,
+            password=self.config.password,
+            **options,
+        )
+
     async def disconnect(self) -> None:
         """Disconnect from Redis database"""
         if self.client:
-            self.client.close()
+            await self.client.aclose()
             self.client = None
+        if self.raw_client:
+            await self.raw_client.aclose()
+            self.raw_client = None
         self.connected = False
 
+    @single_flight
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze Redis storage"""
         if not self.client:
             await self.connect()
 
-        info = self.client.info("memory")
+        info, (key_types, key_sizes) = await asyncio.gather(
+            self.client.info("memory"), self._scan_keys(with_sizes=True)
+        )
         total_size = info.get("used_memory", 0)
 
-        # Get all keys
-        keys = self.client.keys("*")
-        key_types = {}
-        key_sizes = {}
-
-        for key in keys:
-            key_type = (
-                self.client.type(key).decode()
-                if isinstance(self.client.type(key), bytes)
-                else self.client.type(key)
-            )
-            key_types[key_type] = key_types.get(key_type, 0) + 1
-
-            try:
-                memory_usage = self.client.memory_usage(key)
-                key_sizes[key] = memory_usage
-            except Exception:
-                key_sizes[key] = 0
-
         # Create tables from key types
         tables = []
         for key_type, count in key_types.items():
@@ -93,11 +104,7 @@ class RedisConnection(DatabaseConnection):
         if key_sizes:
             largest_key_name = max(key_sizes, key=key_sizes.get)
             largest_key = {
-                "name": (
-                    largest_key_name.decode()
-                    if isinstance(largest_key_name, bytes)
-                    else largest_key_name
-                ),
+                "name": largest_key_name.decode("utf-8", "backslashreplace"),
                 "size": key_sizes[largest_key_name],
             }
 
@@ -111,6 +118,48 @@ class RedisConnection(DatabaseConnection):
             "lastAnalyzed": __import__("datetime").datetime.now().isoformat(),
         }
 
+    async def _scan_keys(
+        self, with_sizes: bool
+    ) -> Tuple[Dict[str, int], Dict[bytes, int]]:
+        """Count keys per type and optionally collect their memory usage
+
+        Keys are walked with SCAN rather than KEYS so the server is never
+        blocked, and TYPE/MEMORY USAGE are sent in pipelined batches. Key
+        names stay raw bytes, so sizes are keyed by bytes.
+        """
+        key_types: Dict[str, int] = {}
+        key_sizes: Dict[bytes, int] = {}
+
+        async def flush(batch: List[bytes]) -> None:
+            pipe = self.raw_client.pipeline(transaction=False)
+            for key in batch:
+                pipe.type(key)
+                if with_sizes:
+                    pipe.memory_usage(key)
+            results = await pipe.execute(raise_on_error=False)
+            types = results[0::2] if with_sizes else results
+            for index, key in enumerate(batch):
+                key_type = types[index]
+                if isinstance(key_type, Exception):
+                    continue
+                if isinstance(key_type, bytes):
+                    key_type = key_type.decode()
+                key_types[key_type] = key_types.get(key_type, 0) + 1
+                if with_sizes:
+                    size = results[2 * index + 1]
+                    key_sizes[key] = 0 if isinstance(size, Exception) else size or 0
+
+        batch: List[bytes] = []
+        async for key in self.raw_client.scan_iter(match="*", count=_SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= _PIPELINE_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+        return key_types, key_sizes
+
     async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
         """Execute a Redis command"""
         if not self.client:
@@ -131,9 +180,9 @@ class RedisConnection(DatabaseConnection):
                     pipe = self.client.pipeline()
                     for cmd in commands:
                         pipe.execute_command(*cmd)
-                    result = pipe.execute()
+                    result = await pipe.execute()
                 else:
-                    result = [self.client.execute_command(*commands)]
+                    result = [await self.client.execute_command(*commands)]
             except (json.JSONDecodeError, TypeError):
                 # Parse as space-separated command
                 parts = query.split()
@@ -143,27 +192,12 @@ class RedisConnection(DatabaseConnection):
                 # Decode bytes arguments
                 args = [arg.decode() if isinstance(arg, bytes) else arg for arg in args]
 
-                result = self.client.execute_command(command, *args)
+                result = await self.client.execute_command(command, *args)
 
             # Normalize result
             if not isinstance(result, list):
                 result = [result]
 
-            # Decode bytes in result
-            def decode_value(val):
-                if isinstance(val, bytes):
-                    try:
-                        return val.decode()
-                    except:
-                        return val
-                elif isinstance(val, list):
-                    return [decode_value(v) for v in val]
-                elif isinstance(val, dict):
-                    return {k: decode_value(v) for k, v in val.items()}
-                return val
-
-            result = [decode_value(r) for r in result]
-
             execution_time = int((time.time() - start_time) * 1000)
 
             return {
@@ -176,21 +210,13 @@ class RedisConnection(DatabaseConnection):
         except Exception as e:
             raise RuntimeError(f"Query execution failed: {str(e)}")
 
+    @single_flight
     async def get_schema(self) -> SchemaInfo:
         """Get Redis schema"""
         if not self.client:
             await self.connect()
 
-        keys = self.client.keys("*")
-        key_types = {}
-
-        for key in keys:
-            key_type = (
-                self.client.type(key).decode()
-                if isinstance(self.client.type(key), bytes)
-                else self.client.type(key)
-            )
-            key_types[key_type] = key_types.get(key_type, 0) + 1
+        key_types, _ = await self._scan_keys(with_sizes=False)
 
         # Create tables from key types
         tables = []
@@ -230,13 +256,13 @@ class RedisConnection(DatabaseConnection):
         if not self.client:
             await self.connect()
 
-        # Save Redis RDB file
-        self.client.save()
+        # Snapshot in a forked child; SAVE would block every other client
+        await self._background_save()
 
         # Get Redis data directory and dbfilename
-        config = self.client.config_get("dir")
+        config = await self.client.config_get("dir")
         redis_dir = config.get("dir", "/var/lib/redis")
-        dbfilename_config = self.client.config_get("dbfilename")
+        dbfilename_config = await self.client.config_get("dbfilename")
         dbfilename = dbfilename_config.get("dbfilename", "dump.rdb")
 
         rdb_path = Path(redis_dir) / dbfilename
@@ -247,14 +273,44 @@ class RedisConnection(DatabaseConnection):
         backup_file = Path(backup_path)
         backup_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Copy RDB file
-        import shutil
-
-        shutil.copy2(rdb_path, backup_file)
+        # copyfile uses sendfile/copy_file_range where available, so the
+        # snapshot is copied in the kernel; run it off the event loop
+        await asyncio.to_thread(shutil.copyfile, rdb_path, backup_file)
         size = backup_file.stat().st_size
 
         return {"path": str(backup_file), "size": size}
 
+    async def _background_save(self) -> None:
+        """Run BGSAVE and wait for the snapshot to finish
+
+        A save or AOF rewrite already running would leave an older RDB file
+        on disk, so BGSAVE is retried once it ends.
+        """
+        while True:
+            try:
+                await self.client.bgsave()
+                break
+            except ResponseError as e:
+                # Any other refusal fails the backup
+                if "in progress" not in str(e):
+                    raise
+                await self._wait_for_persistence()
+
+        info = await self._wait_for_persistence()
+        if info.get("rdb_last_bgsave_status") != "ok":
+            raise RuntimeError("Redis BGSAVE failed")
+
+    async def _wait_for_persistence(self) -> Dict[str, Any]:
+        """Wait until no RDB save or AOF rewrite runs, returning INFO persistence"""
+        while True:
+            info = await self.client.info("persistence")
+            if not (
+                info.get("rdb_bgsave_in_progress")
+                or info.get("aof_rewrite_in_progress")
+            ):
+                return info
+            await asyncio.sleep(_BGSAVE_POLL_INTERVAL)
+
     async def restore_backup(self, backup_path: str) -> None:
         """Restore Redis backup"""
         backup_file = Path(backup_path)
@@ -265,9 +321,9 @@ class RedisConnection(DatabaseConnection):
             await self.connect()
 
         # Get Redis data directory and dbfilename
-        config = self.client.config_get("dir")
+        config = await self.client.config_get("dir")
         redis_dir = config.get("dir", "/var/lib/redis")
-        dbfilename_config = self.client.config_get("dbfilename")
+        dbfilename_config = await self.client.config_get("dbfilename")
         dbfilename = dbfilename_config.get("dbfilename", "dump.rdb")
 
         rdb_path = Path(redis_dir) / dbfilename
@@ -276,9 +332,7 @@ class RedisConnection(DatabaseConnection):
         await self.disconnect()
 
         # Copy backup file to Redis data directory
-        import shutil
-
-        shutil.copy2(backup_file, rdb_path)
+        await asyncio.to_thread(shutil.copyfile, backup_file, rdb_path)
 
         # Note: Redis needs to be restarted to load the new RDB file
         # This is typically done by the system administrator or Docker container restart
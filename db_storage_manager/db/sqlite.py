@@ -3,9 +3,8 @@ SQLite database connection
 """
 
 import asyncio
-import shutil
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import aiosqlite
 
 from .base import (
@@ -14,7 +13,47 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    is_explainable_query,
+    is_select_query,
+    make_row_type,
 )
+from .cache import single_flight
+
+# Tables counted per statement; stays under SQLITE_MAX_COMPOUND_SELECT (500)
+_COUNT_BATCH_SIZE = 250
+
+# Leaf page cells of a table b-tree are its rows; interior pages only hold
+# child pointers
+_DBSTAT_SQL = """
+    SELECT
+        name,
+        SUM(pgsize) AS size,
+        SUM(CASE WHEN pagetype = 'leaf' THEN ncell ELSE 0 END) AS rows
+    FROM dbstat
+    GROUP BY name
+"""
+
+# Bytes in the database file's pages, including indexes and free pages
+_DATABASE_SIZE_SQL = """
+    SELECT page_count * page_size
+    FROM pragma_page_count(), pragma_page_size()
+"""
+
+# Read through a 256 MiB memory map with a 64 MiB page cache
+_MMAP_SIZE = 256 * 1024 * 1024
+_CACHE_SIZE_KIB = 64 * 1024
+
+# Indexes of one table with their columns in key order; expression
+# columns have no name
+_INDEX_COLUMNS_SQL = """
+    SELECT il.name, il."unique", ii.name
+    FROM pragma_index_list(?) AS il, pragma_index_info(il.name) AS ii
+    WHERE il.name NOT LIKE 'sqlite_%'
+    ORDER BY il.name, ii.seqno
+"""
+
+# Pages copied per online backup step; locks are released between steps
+_BACKUP_PAGES = 1024
 
 
 class SQLiteConnection(DatabaseConnection):
@@ -23,6 +62,7 @@ class SQLiteConnection(DatabaseConnection):
     def __init__(self, config: ConnectionConfig):
         super().__init__(config)
         self.connection = None
+        self._dbstat: Optional[bool] = None
 
     async def connect(self) -> None:
         """Connect to SQLite database"""
@@ -31,6 +71,8 @@ class SQLiteConnection(DatabaseConnection):
             raise ValueError("SQLite database path is required")
 
         self.connection = await aiosqlite.connect(db_path)
+        await self.connection.execute(f"PRAGMA mmap_size = {_MMAP_SIZE}")
+        await self.connection.execute(f"PRAGMA cache_size = -{_CACHE_SIZE_KIB}")
         self.connected = True
 
     async def disconnect(self) -> None:
@@ -40,6 +82,12 @@ class SQLiteConnection(DatabaseConnection):
             self.connection = None
         self.connected = False
 
+    async def reset(self) -> None:
+        """Roll back uncommitted work, releasing the database write lock"""
+        if self.connection and self.connection.in_transaction:
+            await self.connection.rollback()
+
+    @single_flight
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze SQLite storage"""
         if not self.connection:
@@ -54,35 +102,7 @@ class SQLiteConnection(DatabaseConnection):
             ORDER BY name
         """
         )
-
-        tables = []
-        total_size = 0
-        db_path = Path(self.config.database or self.config.connection_string)
-        db_size = db_path.stat().st_size if db_path.exists() else 0
-
-        table_rows = await cursor.fetchall()
-        table_count = len(table_rows)
-
-        for (table_name,) in table_rows:
-            # Get row count
-            count_cursor = await self.connection.execute(
-                f'SELECT COUNT(*) FROM "{table_name}"'
-            )
-            row_count = (await count_cursor.fetchone())[0]
-
-            # Approximate table size (distribute total DB size)
-            table_size = db_size // table_count if table_count > 0 else 0
-
-            tables.append(
-                {
-                    "name": table_name,
-                    "size": table_size,
-                    "rowCount": row_count,
-                    "indexSize": 0,
-                    "bloat": 0.0,
-                }
-            )
-            total_size += table_size
+        table_names = [name for (name,) in await cursor.fetchall()]
 
         # Get indexes
         cursor = await self.connection.execute(
@@ -93,20 +113,56 @@ class SQLiteConnection(DatabaseConnection):
             ORDER BY name
         """
         )
+        index_rows = await cursor.fetchall()
+
+        if await self._has_dbstat():
+            # Real b-tree sizes and row counts from a single page scan
+            stats = await self._dbstat_sizes()
+            sizes = {name: size for name, (size, _) in stats.items()}
+            row_counts = {name: rows for name, (_, rows) in stats.items()}
+        else:
+            # Approximate table size (distribute total DB size)
+            db_path = Path(self.config.database or self.config.connection_string)
+            db_size = db_path.stat().st_size if db_path.exists() else 0
+            table_size = db_size // len(table_names) if table_names else 0
+            sizes = dict.fromkeys(table_names, table_size)
+            row_counts = await self._count_rows(table_names)
 
+        index_sizes: Dict[str, int] = {}
         indexes = []
-        for index_name, table_name in await cursor.fetchall():
+        for index_name, table_name in index_rows:
+            size = sizes.get(index_name, 0)
+            index_sizes[table_name] = index_sizes.get(table_name, 0) + size
             indexes.append(
                 {
                     "name": index_name,
                     "tableName": table_name,
-                    "size": 0,
+                    "size": size,
+                    "bloat": 0.0,
+                }
+            )
+
+        tables = []
+        for table_name in table_names:
+            tables.append(
+                {
+                    "name": table_name,
+                    "size": sizes.get(table_name, 0),
+                    "rowCount": row_counts.get(table_name, 0),
+                    "indexSize": index_sizes.get(table_name, 0),
                     "bloat": 0.0,
                 }
             )
 
+        # The whole file, as table sizes leave out indexes and free pages
+        cursor = await self.connection.execute(_DATABASE_SIZE_SQL)
+        (total_size,) = await cursor.fetchone()
+
+        # Tables are listed by name, so pick the largest by size
         largest_table = (
-            tables[0] if tables else {"name": "N/A", "size": 0, "rowCount": 0}
+            max(tables, key=lambda table: table["size"])
+            if tables
+            else {"name": "N/A", "size": 0, "rowCount": 0}
         )
 
         return {
@@ -119,12 +175,42 @@ class SQLiteConnection(DatabaseConnection):
             "lastAnalyzed": __import__("datetime").datetime.now().isoformat(),
         }
 
-    async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
-        """Execute a SQLite query"""
+    async def _has_dbstat(self) -> bool:
+        """Whether this SQLite build includes the dbstat virtual table"""
+        if self._dbstat is None:
+            cursor = await self.connection.execute("PRAGMA compile_options")
+            options = {option for (option,) in await cursor.fetchall()}
+            self._dbstat = "ENABLE_DBSTAT_VTAB" in options
+        return self._dbstat
+
+    async def _dbstat_sizes(self) -> Dict[str, Tuple[int, int]]:
+        """Bytes and row count of every table and index b-tree"""
+        cursor = await self.connection.execute(_DBSTAT_SQL)
+        return {
+            name: (size or 0, rows or 0)
+            for name, size, rows in await cursor.fetchall()
+        }
+
+    async def _count_rows(self, table_names: List[str]) -> Dict[str, int]:
+        """Row counts for many tables using one UNION ALL per batch"""
+        row_counts: Dict[str, int] = {}
+        for start in range(0, len(table_names), _COUNT_BATCH_SIZE):
+            batch = table_names[start : start + _COUNT_BATCH_SIZE]
+            count_sql = " UNION ALL ".join(
+                f"SELECT ?, COUNT(*) FROM {_quote_identifier(name)}" for name in batch
+            )
+            cursor = await self.connection.execute(count_sql, batch)
+            row_counts.update(await cursor.fetchall())
+        return row_counts
+
+    async def execute_query(
+        self, query: str, safe_mode: bool = True, max_rows: Optional[int] = None
+    ) -> QueryResult:
+        """Execute a SQLite query, returning at most ``max_rows`` rows"""
         if not self.connection:
             await self.connect()
 
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+        if safe_mode and not is_select_query(query):
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
         import time
@@ -133,11 +219,18 @@ class SQLiteConnection(DatabaseConnection):
 
         try:
             cursor = await self.connection.execute(query)
-            rows = await cursor.fetchall()
+            if max_rows is None:
+                rows = await cursor.fetchall()
+            else:
+                # SQLite steps lazily, so unread rows are never materialized
+                rows = await cursor.fetchmany(max_rows)
+            await cursor.close()
 
             if cursor.description:
                 columns = [desc[0] for desc in cursor.description]
-                rows_dict = [dict(zip(columns, row)) for row in rows]
+                # Plain tuple rows sharing one column index, not a dict each
+                row_type = make_row_type(columns)
+                rows_dict = list(map(row_type, rows))
             else:
                 columns = ["affected_rows"]
                 rows_dict = [{"affected_rows": self.connection.total_changes}]
@@ -146,7 +239,7 @@ class SQLiteConnection(DatabaseConnection):
 
             # Get explain plan for SELECT queries
             explain_plan = None
-            if query.strip().upper().startswith("SELECT"):
+            if is_explainable_query(query):
                 try:
                     explain_cursor = await self.connection.execute(
                         f"EXPLAIN QUERY PLAN {query}"
@@ -165,6 +258,7 @@ class SQLiteConnection(DatabaseConnection):
         except Exception as e:
             raise RuntimeError(f"Query execution failed: {str(e)}")
 
+    @single_flight
     async def get_schema(self) -> SchemaInfo:
         """Get SQLite schema"""
         if not self.connection:
@@ -180,52 +274,16 @@ class SQLiteConnection(DatabaseConnection):
         """
         )
 
-        tables = []
-        for (table_name,) in await cursor.fetchall():
-            # Get columns using PRAGMA
-            pragma_cursor = await self.connection.execute(
-                f"PRAGMA table_info({table_name})"
-            )
-            columns_data = await pragma_cursor.fetchall()
-
-            columns = []
-            for col in columns_data:
-                columns.append(
-                    {
-                        "name": col[1],  # column name
-                        "type": col[2],  # data type
-                        "nullable": col[3] == 0,  # not null flag
-                        "defaultValue": col[4],  # default value
-                    }
-                )
-
-            # Get indexes
-            index_cursor = await self.connection.execute(
-                """
-                SELECT name, sql
-                FROM sqlite_master
-                WHERE type = 'index' AND tbl_name = ? AND name NOT LIKE 'sqlite_%'
-            """,
-                (table_name,),
-            )
-
-            indexes = []
-            for index_name, index_sql in await index_cursor.fetchall():
-                indexes.append(
-                    {
-                        "name": index_name,
-                        "columns": [],
-                        "unique": "UNIQUE" in (index_sql or "").upper(),
-                    }
+        # aiosqlite queues the per-table queries on its worker thread
+        # back to back instead of waiting on the event loop between each
+        tables = list(
+            await asyncio.gather(
+                *(
+                    self._fetch_table_meta(table_name)
+                    for (table_name,) in await cursor.fetchall()
                 )
-
-            tables.append(
-                {
-                    "name": table_name,
-                    "columns": columns,
-                    "indexes": indexes,
-                }
             )
+        )
 
         return {
             "schemas": [
@@ -236,20 +294,58 @@ class SQLiteConnection(DatabaseConnection):
             ]
         }
 
+    async def _fetch_table_meta(self, table_name: str) -> Dict[str, Any]:
+        """Columns and indexes of one table"""
+        # Get columns using PRAGMA
+        pragma_cursor = await self.connection.execute(
+            f"PRAGMA table_info({_quote_identifier(table_name)})"
+        )
+        columns_data = await pragma_cursor.fetchall()
+
+        columns = []
+        for col in columns_data:
+            columns.append(
+                {
+                    "name": col[1],  # column name
+                    "type": col[2],  # data type
+                    "nullable": col[3] == 0,  # not null flag
+                    "defaultValue": col[4],  # default value
+                }
+            )
+
+        # Get indexes with their columns
+        index_cursor = await self.connection.execute(
+            _INDEX_COLUMNS_SQL, (table_name,)
+        )
+
+        indexes: Dict[str, Dict[str, Any]] = {}
+        for index_name, unique, column_name in await index_cursor.fetchall():
+            index = indexes.setdefault(
+                index_name,
+                {"name": index_name, "columns": [], "unique": bool(unique)},
+            )
+            if column_name is not None:
+                index["columns"].append(column_name)
+
+        return {
+            "name": table_name,
+            "columns": columns,
+            "indexes": list(indexes.values()),
+        }
+
     async def create_backup(self, backup_path: str) -> Dict[str, Any]:
         """Create SQLite backup"""
         if not self.connection:
             await self.connect()
 
-        db_path = Path(self.config.database or self.config.connection_string)
-        if not db_path.exists():
-            raise FileNotFoundError(f"Database file not found: {db_path}")
-
         backup_file = Path(backup_path)
         backup_file.parent.mkdir(parents=True, exist_ok=True)
+        backup_file.unlink(missing_ok=True)
 
-        # Copy database file
-        shutil.copy2(db_path, backup_file)
+        # Online backup API: a consistent snapshot even with concurrent
+        # writers or an uncheckpointed WAL, unlike copying the file
+        async with aiosqlite.connect(str(backup_file)) as target:
+            await self.connection.backup(target, pages=_BACKUP_PAGES)
         size = backup_file.stat().st_size
 
         return {"path": str(backup_file), "size": size}
@@ -260,13 +356,15 @@ class SQLiteConnection(DatabaseConnection):
         if not backup_file.exists():
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
 
-        db_path = Path(self.config.database or self.config.connection_string)
+        if not self.connection:
+            await self.connect()
 
-        # Disconnect before restoring
-        await self.disconnect()
+        # Copy the backup into the open database through the backup API;
+        # SQLite swaps the pages in under its own locking, so there is no
+        # disconnect and no torn file for other readers to see
+        async with aiosqlite.connect(str(backup_file)) as source:
+            await source.backup(self.connection, pages=_BACKUP_PAGES)
 
-        # Copy backup file to database location
-        shutil.copy2(backup_file, db_path)
 
-        # Reconnect
-        await self.connect()
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
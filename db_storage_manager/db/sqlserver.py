@@ -3,7 +3,18 @@ Microsoft SQL Server database connection
 """
 
 import asyncio
-from typing import Any, Dict, List
+import contextlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 try:
     import pyodbc
@@ -16,7 +27,89 @@ from .base import (
     StorageAnalysis,
     QueryResult,
     SchemaInfo,
+    ResultRow,
+    FETCH_BATCH_SIZE,
+    fetch_rows,
+    is_select_query,
+    make_row_type,
 )
+from .cache import ReflectionCache, _ttl
+from .pool import IdlePool
+
+T = TypeVar("T")
+
+_TABLE_SIZES_SQL = """
+    SELECT
+        t.NAME AS name,
+        p.rows AS row_count,
+        SUM(a.total_pages) * 8 * 1024 AS size
+    FROM sys.tables t
+    INNER JOIN sys.indexes i ON t.OBJECT_ID = i.object_id
+    INNER JOIN sys.partitions p
+        ON i.object_id = p.OBJECT_ID AND i.index_id = p.index_id
+    INNER JOIN sys.allocation_units a ON p.partition_id = a.container_id
+    WHERE t.NAME NOT LIKE 'dt%' AND t.is_ms_shipped = 0 AND i.OBJECT_ID > 255
+    GROUP BY t.NAME, p.rows
+    ORDER BY size DESC
+"""
+
+_INDEX_SIZES_SQL = """
+    SELECT
+        i.name AS name,
+        OBJECT_NAME(i.object_id) AS table_name,
+        SUM(s.used_page_count) * 8 * 1024 AS size
+    FROM sys.indexes i
+    INNER JOIN sys.dm_db_partition_stats s
+        ON i.object_id = s.object_id AND i.index_id = s.index_id
+    WHERE i.object_id > 255
+    GROUP BY i.name, i.object_id
+"""
+
+# Tables, views and procedures in one round trip, tagged by kind
+_SCHEMA_SQL = """
+    SELECT 'tables' AS kind, TABLE_NAME AS name
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_TYPE = 'BASE TABLE'
+    UNION ALL
+    SELECT 'views', TABLE_NAME
+    FROM INFORMATION_SCHEMA.VIEWS
+    UNION ALL
+    SELECT 'procedures', ROUTINE_NAME
+    FROM INFORMATION_SCHEMA.ROUTINES
+    WHERE ROUTINE_TYPE = 'PROCEDURE'
+    ORDER BY kind, name
+"""
+
+# Changes whenever an object is created, altered or dropped
+_SCHEMA_TOKEN_SQL = """
+    SELECT CHECKSUM_AGG(CHECKSUM(object_id, modify_date)), COUNT_BIG(*)
+    FROM sys.objects
+"""
+
+# The database and file are bound as variables, never spliced into the
+# statement. Express edition cannot write compressed backups.
+_BACKUP_SQL = """
+    DECLARE @db sysname = ?, @path nvarchar(4000) = ?;
+    DECLARE @name nvarchar(128) = LEFT(N'Full Backup of ' + @db, 128);
+    IF CAST(SERVERPROPERTY('EngineEdition') AS int) = 4
+        BACKUP DATABASE @db TO DISK = @path
+        WITH FORMAT, INIT, NAME = @name,
+            BUFFERCOUNT = 50, MAXTRANSFERSIZE = 4194304;
+    ELSE
+        BACKUP DATABASE @db TO DISK = @path
+        WITH FORMAT, INIT, NAME = @name, COMPRESSION,
+            BUFFERCOUNT = 50, MAXTRANSFERSIZE = 4194304;
+"""
+
+_RESTORE_SQL = """
+    DECLARE @db sysname = ?, @path nvarchar(4000) = ?;
+    RESTORE DATABASE @db FROM DISK = @path
+    WITH REPLACE, BUFFERCOUNT = 50, MAXTRANSFERSIZE = 4194304;
+"""
+
+# Idle ODBC connections shared by every SQLServerConnection, so reconnects
+# and test_connection skip the TCP, TLS and login handshake
+_POOL = IdlePool()
 
 
 class SQLServerConnection(DatabaseConnection):
@@ -25,15 +118,53 @@ class SQLServerConnection(DatabaseConnection):
     def __init__(self, config: ConnectionConfig):
         super().__init__(config)
         self.connection = None
+        # pyodbc connections must not run two statements at once
+        self._lock = asyncio.Lock()
+        self._batch_size = config.fetch_batch_size or FETCH_BATCH_SIZE
+        # On-disk schema and storage metadata; opt out with
+        # extra={"reflection_cache": False}
+        self._reflection: Optional[ReflectionCache] = None
+        if (config.extra or {}).get("reflection_cache", True):
+            self._reflection = ReflectionCache.for_database(
+                config.type,
+                config.host,
+                config.port,
+                config.database,
+                config.username,
+                config.connection_string,
+            )
+        # Token shared by the calls inside caching_schema()
+        self._schema_token: Optional[Tuple[Any, ...]] = None
         if pyodbc is None:
             raise ImportError(
                 "pyodbc is required for SQL Server support. Install it with: pip install pyodbc"
             )
 
+    def _cursor(self, connection=None):
+        """Open a cursor that moves rows and parameters in batches"""
+        cursor = (connection or self.connection).cursor()
+        cursor.arraysize = self._batch_size
+        # Send executemany() parameters as one array instead of per row
+        cursor.fast_executemany = True
+        return cursor
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        """Run a blocking pyodbc call in a worker thread, one at a time"""
+        async with self._lock:
+            return await asyncio.to_thread(function, *args)
+
     async def connect(self) -> None:
         """Connect to SQL Server database"""
+        # Acquiring may open a connection, which blocks on the handshake
+        self.connection = await asyncio.to_thread(
+            _POOL.acquire, self.config.pool_key(), self._open, _ping
+        )
+        self.connected = True
+
+    def _open(self):
+        """Open a new server connection"""
         if self.config.connection_string:
-            self.connection = pyodbc.connect(self.config.connection_string)
+            conn_str = self.config.connection_string
         else:
             driver = "{ODBC Driver 17 for SQL Server}"  # Try common driver
             conn_str = (
@@ -43,43 +174,38 @@ class SQLServerConnection(DatabaseConnection):
                 f"UID={self.config.username};"
                 f"PWD={self.config.password}"
             )
-            self.connection = pyodbc.connect(conn_str)
-        self.connected = True
+        return pyodbc.connect(conn_str)
 
     async def disconnect(self) -> None:
         """Disconnect from SQL Server database"""
         if self.connection:
-            self.connection.close()
+            await self._run(_POOL.release, self.config.pool_key(), self.connection)
             self.connection = None
         self.connected = False
 
+    async def reset(self) -> None:
+        """End the open transaction, releasing locks taken by its queries"""
+        if self.connection:
+            await self._run(self.connection.rollback)
+
     async def analyze_storage(self) -> StorageAnalysis:
         """Analyze SQL Server storage"""
-        if not self.connection:
-            await self.connect()
-
-        cursor = self.connection.cursor()
-
-        # Get table sizes
-        cursor.execute(
-            """
-            SELECT 
-                t.NAME AS name,
-                p.rows AS row_count,
-                SUM(a.total_pages) * 8 * 1024 AS size
-            FROM sys.tables t
-            INNER JOIN sys.indexes i ON t.OBJECT_ID = i.object_id
-            INNER JOIN sys.partitions p ON i.object_id = p.OBJECT_ID AND i.index_id = p.index_id
-            INNER JOIN sys.allocation_units a ON p.partition_id = a.container_id
-            WHERE t.NAME NOT LIKE 'dt%' AND t.is_ms_shipped = 0 AND i.OBJECT_ID > 255
-            GROUP BY t.NAME, p.rows
-            ORDER BY size DESC
-        """
+        await self._ensure_connected()
+        # Sizes and row counts change without DDL, so they also expire
+        return await self._cached(
+            "analyze_storage", self._load_storage, _ttl(self, None)
+        )
+
+    async def _load_storage(self) -> StorageAnalysis:
+        # Independent catalog scans, each on its own pooled connection
+        table_rows, index_rows = await asyncio.gather(
+            asyncio.to_thread(self._fetch_pooled, _TABLE_SIZES_SQL),
+            asyncio.to_thread(self._fetch_pooled, _INDEX_SIZES_SQL),
         )
 
         tables = []
         total_size = 0
-        for row in cursor.fetchall():
+        for row in table_rows:
             table_size = row[2] or 0
             tables.append(
                 {
@@ -92,23 +218,9 @@ class SQLServerConnection(DatabaseConnection):
             )
             total_size += table_size
 
-        # Get indexes
-        cursor.execute(
-            """
-            SELECT 
-                i.name AS name,
-                OBJECT_NAME(i.object_id) AS table_name,
-                SUM(s.used_page_count) * 8 * 1024 AS size
-            FROM sys.indexes i
-            INNER JOIN sys.dm_db_partition_stats s ON i.object_id = s.object_id AND i.index_id = s.index_id
-            WHERE i.object_id > 255
-            GROUP BY i.name, i.object_id
-        """
-        )
-
         indexes = []
         index_total = 0
-        for row in cursor.fetchall():
+        for row in index_rows:
             index_size = row[2] or 0
             indexes.append(
                 {
@@ -120,10 +232,9 @@ class SQLServerConnection(DatabaseConnection):
             )
             index_total += index_size
 
-        cursor.close()
-
+        # Table sizes are ordered by size, so the first table is the largest
         largest_table = (
-            max(tables, key=lambda t: t["size"])
+            tables[0]
             if tables
             else {"name": "", "size": 0, "rowCount": 0, "indexSize": 0, "bloat": 0.0}
         )
@@ -137,23 +248,31 @@ class SQLServerConnection(DatabaseConnection):
             "indexes": indexes,
         }
 
-    async def execute_query(self, query: str, safe_mode: bool = True) -> QueryResult:
-        """Execute query on SQL Server database"""
-        if not self.connection:
-            await self.connect()
+    async def execute_query(
+        self, query: str, safe_mode: bool = True, max_rows: Optional[int] = None
+    ) -> QueryResult:
+        """Execute query on SQL Server database, returning at most ``max_rows`` rows"""
+        await self._ensure_connected()
 
-        if safe_mode and not query.strip().upper().startswith("SELECT"):
+        is_select = is_select_query(query)
+        if safe_mode and not is_select:
             raise ValueError("Only SELECT queries are allowed in safe mode")
 
-        cursor = self.connection.cursor()
+        return await self._run(self._execute_query_sync, query, is_select, max_rows)
+
+    def _execute_query_sync(
+        self, query: str, is_select: bool, max_rows: Optional[int]
+    ) -> QueryResult:
+        cursor = self._cursor()
         try:
             cursor.execute(query)
 
-            if query.strip().upper().startswith("SELECT"):
+            if is_select:
                 columns = [desc[0] for desc in cursor.description]
-                rows = []
-                for row in cursor.fetchall():
-                    rows.append(dict(zip(columns, row)))
+                # Plain tuple rows sharing one column index, not a dict each
+                row_type = make_row_type(columns)
+                fetched = fetch_rows(cursor, max_rows, self._batch_size)
+                rows = list(map(row_type, fetched))
                 return {
                     "columns": columns,
                     "rows": rows,
@@ -169,97 +288,192 @@ class SQLServerConnection(DatabaseConnection):
         finally:
             cursor.close()
 
+    async def fetch_stream(
+        self, query: str, batch_size: Optional[int] = None
+    ) -> AsyncIterator[List[ResultRow]]:
+        """Yield the rows of a SELECT in batches as they arrive
+
+        Rows are read on a connection borrowed from the shared pool, so a
+        consumer that renders each batch, or stops without closing the
+        stream, does not block other calls on this connection.
+        """
+        async with contextlib.aclosing(
+            self._stream_select(query, batch_size)
+        ) as batches:
+            async for _, rows in batches:
+                if rows:
+                    yield rows
+
+    async def _stream_select(
+        self, query: str, batch_size: Optional[int]
+    ) -> AsyncIterator[Tuple[List[str], List[ResultRow]]]:
+        """Yield ``(columns, rows)`` batches, the first even if it is empty"""
+        if not is_select_query(query):
+            raise ValueError("Only SELECT queries can be streamed")
+        batch_size = batch_size or self._batch_size
+
+        key = self.config.pool_key()
+        connection = await asyncio.to_thread(_POOL.acquire, key, self._open, _ping)
+        try:
+            cursor = self._cursor(connection)
+            try:
+                await asyncio.to_thread(cursor.execute, query)
+                columns = [desc[0] for desc in cursor.description]
+                row_type = make_row_type(columns)
+                batch = await asyncio.to_thread(cursor.fetchmany, batch_size)
+                # Consumers learn the columns of an empty result this way
+                yield columns, list(map(row_type, batch))
+                while batch := await asyncio.to_thread(cursor.fetchmany, batch_size):
+                    yield columns, list(map(row_type, batch))
+            finally:
+                cursor.close()
+        finally:
+            await asyncio.to_thread(_POOL.release, key, connection)
+
+    async def stream_query(
+        self, query: str, safe_mode: bool = True, batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[List[str], List[ResultRow]]]:
+        """Yield ``(columns, rows)`` batches, reading SELECTs incrementally"""
+        if not is_select_query(query):
+            async for batch in super().stream_query(query, safe_mode, batch_size):
+                yield batch
+            return
+        async with contextlib.aclosing(
+            self._stream_select(query, batch_size)
+        ) as batches:
+            async for batch in batches:
+                yield batch
+
     async def get_schema(self) -> SchemaInfo:
         """Get SQL Server database schema"""
-        if not self.connection:
-            await self.connect()
-
-        cursor = self.connection.cursor()
-
-        # Get tables
-        cursor.execute(
-            """
-            SELECT TABLE_NAME
-            FROM INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_TYPE = 'BASE TABLE'
-            ORDER BY TABLE_NAME
-        """
+        await self._ensure_connected()
+        return await self._cached(
+            "get_schema", lambda: self._run(self._get_schema_sync)
         )
-        tables = [row[0] for row in cursor.fetchall()]
-
-        # Get views
-        cursor.execute(
-            """
-            SELECT TABLE_NAME
-            FROM INFORMATION_SCHEMA.VIEWS
-            ORDER BY TABLE_NAME
-        """
-        )
-        views = [row[0] for row in cursor.fetchall()]
-
-        # Get stored procedures
-        cursor.execute(
-            """
-            SELECT ROUTINE_NAME
-            FROM INFORMATION_SCHEMA.ROUTINES
-            WHERE ROUTINE_TYPE = 'PROCEDURE'
-            ORDER BY ROUTINE_NAME
-        """
-        )
-        procedures = [row[0] for row in cursor.fetchall()]
+
+    @contextlib.asynccontextmanager
+    async def caching_schema(self) -> AsyncIterator[None]:
+        """Check the schema token once for every reflection call in the block"""
+        if self._schema_token is not None:
+            yield
+            return
+        await self._ensure_connected()
+        self._schema_token = await self._run(self._read_schema_token)
+        try:
+            yield
+        finally:
+            self._schema_token = None
+
+    def clear_cache(self) -> None:
+        """Drop cached metadata, including the on-disk reflection cache"""
+        self.invalidate_cache()
+        if self._reflection is not None:
+            self._reflection.clear()
+
+    async def _cached(
+        self,
+        name: str,
+        load: Callable[[], Awaitable[T]],
+        max_age: Optional[float] = None,
+    ) -> T:
+        """Return ``load()`` from the reflection cache while the schema is unchanged"""
+        if self._reflection is None:
+            return await load()
+        token = self._schema_token or await self._run(self._read_schema_token)
+        result = await asyncio.to_thread(self._reflection.get, name, token, max_age)
+        if result is None:
+            result = await load()
+            await asyncio.to_thread(self._reflection.put, name, token, result)
+        return result
+
+    def _fetch_pooled(self, sql: str) -> List[Any]:
+        """Run a catalog query on a connection borrowed from the shared pool"""
+        key = self.config.pool_key()
+        connection = _POOL.acquire(key, self._open, _ping)
+        try:
+            cursor = self._cursor(connection)
+            try:
+                cursor.execute(sql)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            _POOL.release(key, connection)
+
+    def _read_schema_token(self) -> Tuple[Any, ...]:
+        cursor = self._cursor()
+        try:
+            cursor.execute(_SCHEMA_TOKEN_SQL)
+            return tuple(cursor.fetchone())
+        finally:
+            cursor.close()
+
+    def _get_schema_sync(self) -> SchemaInfo:
+        cursor = self._cursor()
+
+        cursor.execute(_SCHEMA_SQL)
+        schema: SchemaInfo = {"tables": [], "views": [], "procedures": []}
+        for kind, name in cursor:
+            schema[kind].append(name)
 
         cursor.close()
 
-        return {
-            "tables": tables,
-            "views": views,
-            "procedures": procedures,
-        }
+        return schema
 
     async def test_connection(self) -> bool:
         """Test SQL Server connection"""
         try:
-            await self.connect()
-            await self.disconnect()
+            if self.connection is not None:
+                # A live session only needs a round trip, not a new login
+                await self._run(_ping, self.connection)
+            else:
+                # Reuses and pings an idle pooled connection when there is one
+                await self.connect()
+                await self.disconnect()
             return True
         except Exception:
             return False
 
     async def create_backup(self, backup_path: str) -> str:
         """Create SQL Server backup"""
-        if not self.connection:
-            await self.connect()
+        await self._ensure_connected()
+        try:
+            return await self._run(self._create_backup_sync, backup_path)
+        finally:
+            self.clear_cache()
 
-        cursor = self.connection.cursor()
+    def _create_backup_sync(self, backup_path: str) -> str:
         backup_file = f"{backup_path}.bak"
+        self._execute_maintenance(_BACKUP_SQL, self.config.database, backup_file)
+        return backup_file
 
+    async def restore_backup(self, backup_path: str) -> None:
+        """Restore SQL Server backup"""
+        await self._ensure_connected()
         try:
-            cursor.execute(
-                f"""
-                BACKUP DATABASE [{self.config.database}]
-                TO DISK = '{backup_file}'
-                WITH FORMAT, INIT, NAME = 'Full Backup of {self.config.database}'
-            """
-            )
-            self.connection.commit()
-            return backup_file
+            await self._run(self._restore_backup_sync, backup_path)
         finally:
-            cursor.close()
+            self.clear_cache()
 
-    async def restore_backup(self, backup_path: str) -> None:
-        """Restore SQL Server backup"""
-        if not self.connection:
-            await self.connect()
+    def _restore_backup_sync(self, backup_path: str) -> None:
+        self._execute_maintenance(_RESTORE_SQL, self.config.database, backup_path)
 
-        cursor = self.connection.cursor()
+    def _execute_maintenance(self, sql: str, *params: Any) -> None:
+        """Run BACKUP or RESTORE, which refuse to run inside a transaction"""
+        autocommit = self.connection.autocommit
+        self.connection.autocommit = True
+        cursor = self._cursor()
         try:
-            cursor.execute(
-                f"""
-                RESTORE DATABASE [{self.config.database}]
-                FROM DISK = '{backup_path}'
-                WITH REPLACE
-            """
-            )
-            self.connection.commit()
+            cursor.execute(sql, *params)
+            # Progress comes back as extra result sets; the statement is
+            # only finished once they have all been read
+            while cursor.nextset():
+                pass
         finally:
             cursor.close()
+            self.connection.autocommit = autocommit
+
+
+def _ping(connection) -> None:
+    """Raise if a pooled connection has gone away"""
+    connection.cursor().execute("SELECT 1").fetchone()
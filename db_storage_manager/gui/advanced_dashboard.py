@@ -9,22 +9,19 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QComboBox,
     QLabel,
-    QMenu,
-    QAction,
-    QMessageBox,
     QLineEdit,
     QCheckBox,
 )
-from PyQt6.QtCore import Qt, QMimeData, pyqtSignal, QPointF
-from PyQt6.QtGui import QDrag, QPainter, QColor
-from typing import List, Dict, Any, Optional
-import json
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPointF
+from typing import Dict, Optional
 
 from ..i18n.manager import get_i18n_manager
 from .utils import apply_glassmorphism
 from .charts import LineChartWidget, BarChartWidget, PieChartWidget
 from .dashboard import DashboardWidget
 
+FILTER_DELAY_MS = 200
+
 
 class DraggableWidget(QWidget):
     """Base draggable widget"""
@@ -37,6 +34,10 @@ class DraggableWidget(QWidget):
     def mousePressEvent(self, event):
         """Handle mouse press for dragging"""
         if event.button() == Qt.MouseButton.LeftButton:
+            # Only needed once the user starts dragging
+            from PyQt6.QtCore import QMimeData
+            from PyQt6.QtGui import QDrag
+
             drag = QDrag(self)
             mime_data = QMimeData()
             mime_data.setText(self.widget_type)
@@ -133,6 +134,12 @@ class AdvancedDashboardWidget(QWidget):
         self.filter_edit.textChanged.connect(self._apply_filter)
         toolbar.addWidget(self.filter_edit)
 
+        # Filter once typing pauses rather than on every keystroke
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._do_filter)
+
         toolbar.addStretch()
 
         # Real-time update toggle
@@ -155,6 +162,10 @@ class AdvancedDashboardWidget(QWidget):
         self.container.add_widget(widget_type)
 
     def _apply_filter(self, text: str):
+        """Schedule the filter, restarting the delay on each change"""
+        self._filter_timer.start()
+
+    def _do_filter(self):
         """Apply filter to dashboard"""
         # Filter logic would go here
         pass
@@ -16,6 +16,13 @@ from PyQt6.QtCharts import (
 from PyQt6.QtCore import Qt, QPointF
 from PyQt6.QtGui import QPainter, QColor
 from typing import List, Dict, Any, Optional
+import itertools
+
+# Longer line series are downsampled before plotting
+MAX_LINE_POINTS = 10_000
+
+# Distinguishes charts in QPixmapCache keys, unlike id() which is reused
+_chart_ids = itertools.count()
 
 
 class ChartWidget(QWidget):
@@ -27,6 +34,9 @@ class ChartWidget(QWidget):
         self.chart.setTitle(title)
         self.chart_view = QChartView(self.chart)
         self.chart_view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._chart_id = next(_chart_ids)
+        # Bumped on every data change, so cached exports go stale with it
+        self._revision = 0
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -46,9 +56,7 @@ class ChartWidget(QWidget):
 
     def export_png(self, filename: Optional[str] = None):
         """Export chart to PNG"""
-        from PyQt6.QtGui import QPixmap
-
-        pixmap = self.chart_view.grab()
+        pixmap = self._grab()
         if filename:
             pixmap.save(filename, "PNG")
         else:
@@ -60,6 +68,18 @@ class ChartWidget(QWidget):
             if filename:
                 pixmap.save(filename, "PNG")
 
+    def _grab(self):
+        """Render the chart view, reusing the last image while nothing changed"""
+        from PyQt6.QtGui import QPixmapCache
+
+        size = self.chart_view.size()
+        key = f"chart_{self._chart_id}_{self._revision}_{size.width()}x{size.height()}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None or pixmap.isNull():
+            pixmap = self.chart_view.grab()
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
     def export_pdf(self, filename: Optional[str] = None):
         """Export chart to PDF"""
         from PyQt6.QtPrintSupport import QPrinter
@@ -94,28 +114,25 @@ class LineChartWidget(ChartWidget):
         self.y_label = y_label
         self.series_list = []
 
+        # Shared by every series
+        self.axis_x = QValueAxis()
+        self.axis_x.setTitleText(x_label)
+        self.axis_y = QValueAxis()
+        self.axis_y.setTitleText(y_label)
+        self.chart.addAxis(self.axis_x, Qt.AlignmentFlag.AlignBottom)
+        self.chart.addAxis(self.axis_y, Qt.AlignmentFlag.AlignLeft)
+
     def add_series(self, name: str, data: List[QPointF]):
         """Add a data series"""
         series = QLineSeries()
         series.setName(name)
-        for point in data:
-            series.append(point)
+        # One bulk update instead of a repaint per appended point
+        series.replace(_downsample(data, MAX_LINE_POINTS))
         self.chart.addSeries(series)
         self.series_list.append(series)
-
-        # Create axes
-        axis_x = QValueAxis()
-        axis_x.setTitleText(self.x_label)
-        axis_y = QValueAxis()
-        axis_y.setTitleText(self.y_label)
-        self.chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
-        self.chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
-
-        for series in self.series_list:
-            series.attachAxis(axis_x)
-            series.attachAxis(axis_y)
-
-        self.chart.createDefaultAxes()
+        self._revision += 1
+        series.attachAxis(self.axis_x)
+        series.attachAxis(self.axis_y)
 
 
 class BarChartWidget(ChartWidget):
@@ -125,23 +142,44 @@ class BarChartWidget(ChartWidget):
         super().__init__(title)
         self.categories = categories or []
         self.bar_series = QBarSeries()
+        self.chart.addSeries(self.bar_series)
+
+        # Shared by every data set
+        self.axis_x = QBarCategoryAxis()
+        self.axis_x.append(self.categories)
+        self.axis_y = QValueAxis()
+        self.chart.addAxis(self.axis_x, Qt.AlignmentFlag.AlignBottom)
+        self.chart.addAxis(self.axis_y, Qt.AlignmentFlag.AlignLeft)
+        self.bar_series.attachAxis(self.axis_x)
+        self.bar_series.attachAxis(self.axis_y)
 
     def add_data_set(self, name: str, values: List[float]):
         """Add a data set"""
         bar_set = QBarSet(name)
-        for value in values:
-            bar_set.append(value)
+        bar_set.append(values)
         self.bar_series.append(bar_set)
-        self.chart.addSeries(self.bar_series)
+        self._fit_axis_y()
+        self._revision += 1
+
+    def set_data(self, categories: List[str], values: List[float], name: str = ""):
+        """Replace the plotted data with a single data set"""
+        self.bar_series.clear()
+        self.categories = categories
+        self.axis_x.clear()
+        self.axis_x.append(categories)
+        if values:
+            self.add_data_set(name, values)
+        else:
+            self._revision += 1
 
-        # Create axes
-        axis_x = QBarCategoryAxis()
-        axis_x.append(self.categories)
-        axis_y = QValueAxis()
-        self.chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
-        self.chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
-        self.bar_series.attachAxis(axis_x)
-        self.bar_series.attachAxis(axis_y)
+    def _fit_axis_y(self):
+        """Range the value axis over every bar, always including zero"""
+        values = [
+            bar_set.at(i)
+            for bar_set in self.bar_series.barSets()
+            for i in range(bar_set.count())
+        ]
+        self.axis_y.setRange(min([0.0, *values]), max([0.0, *values]))
 
 
 class PieChartWidget(ChartWidget):
@@ -155,3 +193,39 @@ class PieChartWidget(ChartWidget):
     def add_slice(self, label: str, value: float):
         """Add a slice to the pie chart"""
         self.pie_series.append(label, value)
+        self._revision += 1
+
+
+def _downsample(points: List[QPointF], threshold: int) -> List[QPointF]:
+    """Reduce a series to ``threshold`` points, keeping its visual shape
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept and
+    each bucket in between contributes the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    """
+    count = len(points)
+    if count <= threshold or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    kept = points[0]
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        following = points[end : min(int((bucket + 2) * bucket_size) + 1, count)]
+        average_x = sum(point.x() for point in following) / len(following)
+        average_y = sum(point.y() for point in following) / len(following)
+
+        best, best_area = points[start], -1.0
+        for point in points[start:end]:
+            area = abs(
+                (kept.x() - average_x) * (point.y() - kept.y())
+                - (kept.x() - point.x()) * (average_y - kept.y())
+            )
+            if area > best_area:
+                best, best_area = point, area
+        sampled.append(best)
+        kept = best
+    sampled.append(points[-1])
+    return sampled
@@ -7,8 +7,7 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
     QDialog,
     QFormLayout,
@@ -18,13 +17,13 @@ from PyQt6.QtWidgets import (
     QDialogButtonBox,
     QMessageBox,
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
 import uuid
 
 from ..db.factory import DatabaseConnectionFactory
 from ..db.base import ConnectionConfig
 from ..i18n.manager import get_i18n_manager
-from .utils import apply_glassmorphism
+from .utils import apply_glassmorphism, run_async
 
 
 class ConnectionDialog(QDialog):
@@ -121,6 +120,61 @@ class ConnectionDialog(QDialog):
         }
 
 
+class ConnectionsModel(QAbstractTableModel):
+    """Table model reading straight from the connections list"""
+
+    COLUMNS = ("name", "type", "host", "database")
+
+    def __init__(self, connections, headers, parent=None):
+        super().__init__(parent)
+        self.connections = connections
+        self.headers = headers
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.connections)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self.connections[index.row()].get(self.COLUMNS[index.column()], "")
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.headers[section]
+        return None
+
+    def refresh(self):
+        """Re-read the list after it changed, with a single view reset"""
+        self.beginResetModel()
+        self.endResetModel()
+
+    def append_row(self, connection):
+        """Add a connection as the last row"""
+        row = len(self.connections)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.connections.append(connection)
+        self.endInsertRows()
+
+    def replace_row(self, row, connection):
+        """Replace the connection shown in ``row``"""
+        self.connections[row] = connection
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.COLUMNS) - 1)
+        )
+
+    def remove_row(self, row):
+        """Remove the connection shown in ``row``"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.connections[row]
+        self.endRemoveRows()
+
+
 class ConnectionsWidget(QWidget):
     """Connections management widget"""
 
@@ -166,17 +220,19 @@ class ConnectionsWidget(QWidget):
         button_layout.addStretch()
         layout.addLayout(button_layout)
 
-        # Connections table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(
+        # Connections table; the view reads rows from the model on demand
+        self.model = ConnectionsModel(
+            self.connections,
             [
                 t("connections.name").rstrip(":"),
                 t("connections.type").rstrip(":"),
                 t("connections.host").rstrip(":"),
                 t("connections.database").rstrip(":"),
-            ]
+            ],
+            self,
         )
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Stretch
         )
@@ -185,7 +241,7 @@ class ConnectionsWidget(QWidget):
 
     def _on_selection_changed(self):
         """Handle table selection change"""
-        has_selection = len(self.table.selectedRows()) > 0
+        has_selection = self.table.selectionModel().hasSelection()
         self.edit_button.setEnabled(has_selection)
         self.delete_button.setEnabled(has_selection)
         self.test_button.setEnabled(has_selection)
@@ -195,13 +251,12 @@ class ConnectionsWidget(QWidget):
         dialog = ConnectionDialog(parent=self)
         if dialog.exec():
             connection = dialog.get_connection()
-            self.connections.append(connection)
-            self._update_table()
+            self.model.append_row(connection)
             self.connection_added.emit(connection)
 
     def _edit_connection(self):
         """Edit selected connection"""
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return
 
@@ -209,13 +264,12 @@ class ConnectionsWidget(QWidget):
         dialog = ConnectionDialog(connection, parent=self)
         if dialog.exec():
             updated = dialog.get_connection()
-            self.connections[row] = updated
-            self._update_table()
+            self.model.replace_row(row, updated)
             self.connection_updated.emit(updated)
 
     def _delete_connection(self):
         """Delete selected connection"""
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return
 
@@ -229,48 +283,42 @@ class ConnectionsWidget(QWidget):
 
         if reply == QMessageBox.StandardButton.Yes:
             connection_id = self.connections[row]["id"]
-            del self.connections[row]
-            self._update_table()
+            self.model.remove_row(row)
             self.connection_deleted.emit(connection_id)
 
     def _test_connection(self):
         """Test selected connection"""
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             return
 
         connection = self.connections[row]
-        try:
+
+        async def test():
             config = ConnectionConfig(**connection)
             db = DatabaseConnectionFactory.create_connection(config)
+            return await db.test_connection()
 
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(db.test_connection())
-            loop.close()
-
-            t = self.i18n.translate
-            if result:
-                QMessageBox.information(
-                    self, t("common.success"), t("connections.test_success")
-                )
-            else:
-                QMessageBox.warning(
-                    self, t("common.error"), t("connections.test_failed")
-                )
+        run_async(test(), self._on_test_finished)
+
+    def _on_test_finished(self, task):
+        """Report the outcome of a connection test"""
+        t = self.i18n.translate
+        try:
+            result = task.result()
         except Exception as e:
-            t = self.i18n.translate
             QMessageBox.critical(
                 self, t("common.error"), f"{t('errors.connection_failed')}:\n{str(e)}"
             )
+            return
+
+        if result:
+            QMessageBox.information(
+                self, t("common.success"), t("connections.test_success")
+            )
+        else:
+            QMessageBox.warning(self, t("common.error"), t("connections.test_failed"))
 
     def _update_table(self):
         """Update connections table"""
-        self.table.setRowCount(len(self.connections))
-        for row, conn in enumerate(self.connections):
-            self.table.setItem(row, 0, QTableWidgetItem(conn.get("name", "")))
-            self.table.setItem(row, 1, QTableWidgetItem(conn.get("type", "")))
-            self.table.setItem(row, 2, QTableWidgetItem(conn.get("host", "")))
-            self.table.setItem(row, 3, QTableWidgetItem(conn.get("database", "")))
+        self.model.refresh()
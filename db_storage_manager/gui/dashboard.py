@@ -14,55 +14,59 @@ from PyQt6.QtWidgets import (
     QHeaderView,
     QMessageBox,
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer
 import asyncio
+import time
 
-from ..db.factory import DatabaseConnectionFactory
-from ..db.base import ConnectionConfig
+from ..db.pool import DatabasePools
 from ..i18n.manager import get_i18n_manager
-from .utils import apply_glassmorphism
+from .utils import apply_glassmorphism, run_async, set_connection_items
 
+# Seconds a connection's analysis is shown again without re-querying
+ANALYSIS_CACHE_TTL = 60
 
-class AnalysisWorker(QThread):
-    """Worker thread for database analysis"""
+# Table rows added per event-loop turn while filling the tables grid
+FILL_CHUNK_ROWS = 500
 
-    finished = pyqtSignal(dict)
-    error = pyqtSignal(str)
 
-    def __init__(self, connection_config):
-        super().__init__()
-        self.connection_config = connection_config
-
-    def run(self):
-        """Run analysis in thread"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+_SIZE_BASES = tuple(1024.0**i for i in range(len(_SIZE_UNITS)))
 
-            config = ConnectionConfig(**self.connection_config)
-            db = DatabaseConnectionFactory.create_connection(config)
 
-            async def analyze():
-                await db.connect()
-                analysis = await db.analyze_storage()
-                await db.disconnect()
-                return analysis
+def _format_size(size_bytes):
+    """Format size in bytes to human-readable format"""
+    if size_bytes < 1024:
+        return f"{size_bytes:.2f} B"
+    # Each unit is 2**10 of the previous one, so the bit length picks it
+    unit = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / _SIZE_BASES[unit]:.2f} {_SIZE_UNITS[unit]}"
 
-            result = loop.run_until_complete(analyze())
-            loop.close()
 
-            self.finished.emit(result)
-        except Exception as e:
-            self.error.emit(str(e))
+def _format_rows(tables):
+    """Cell text of the tables grid, one list per column"""
+    return [
+        [table["name"] for table in tables],
+        [_format_size(table["size"]) for table in tables],
+        [str(table["rowCount"]) for table in tables],
+        [_format_size(table["indexSize"]) for table in tables],
+        [f"{table['bloat']:.2f}%" for table in tables],
+    ]
 
 
 class DashboardWidget(QWidget):
     """Dashboard widget"""
 
-    def __init__(self, connections):
+    def __init__(self, connections, pools=None):
         super().__init__()
         self.connections = connections
+        self.pools = pools if pools is not None else DatabasePools()
         self.current_analysis = None
+        # connection id -> (monotonic time analyzed, analysis, formatted rows)
+        self._analysis_cache = {}
+        # Bumped per display so a superseded chunked fill stops
+        self._fill_generation = 0
+        # Sorting state to restore once the fill in progress completes
+        self._sorting = None
         self.i18n = get_i18n_manager()
         self.setObjectName("glassmorphism")
         self.init_ui()
@@ -85,9 +89,16 @@ class DashboardWidget(QWidget):
         connection_layout.addWidget(self.connection_combo)
 
         self.analyze_button = QPushButton(t("dashboard.analyze"))
-        self.analyze_button.clicked.connect(self._analyze_database)
+        self.analyze_button.clicked.connect(lambda: self._analyze_database())
         connection_layout.addWidget(self.analyze_button)
 
+        self.refresh_button = QPushButton("↻")
+        self.refresh_button.setToolTip(t("dashboard.refresh"))
+        self.refresh_button.clicked.connect(
+            lambda: self._analyze_database(force_refresh=True)
+        )
+        connection_layout.addWidget(self.refresh_button)
+
         connection_layout.addStretch()
         layout.addLayout(connection_layout)
 
@@ -121,13 +132,11 @@ class DashboardWidget(QWidget):
 
     def _on_connection_changed(self, index):
         """Handle connection selection change"""
-        if index > 0:
-            self.analyze_button.setEnabled(True)
-        else:
-            self.analyze_button.setEnabled(False)
+        self.analyze_button.setEnabled(index > 0)
+        self.refresh_button.setEnabled(index > 0)
 
-    def _analyze_database(self):
-        """Analyze selected database"""
+    def _analyze_database(self, force_refresh=False):
+        """Analyze selected database, reusing a recent result unless forced"""
         index = self.connection_combo.currentIndex()
         if index <= 0:
             return
@@ -136,20 +145,47 @@ class DashboardWidget(QWidget):
         if not connection:
             return
 
+        connection_id = connection["id"]
+        cached = self._analysis_cache.get(connection_id)
+        if (
+            not force_refresh
+            and cached is not None
+            and time.monotonic() - cached[0] < ANALYSIS_CACHE_TTL
+        ):
+            self._on_analysis_finished(cached[1:])
+            return
+
         self.analyze_button.setEnabled(False)
+        self.refresh_button.setEnabled(False)
         self.analyze_button.setText(self.i18n.translate("dashboard.analyzing"))
 
-        # Create worker thread
-        self.worker = AnalysisWorker(connection)
-        self.worker.finished.connect(self._on_analysis_finished)
-        self.worker.error.connect(self._on_analysis_error)
-        self.worker.start()
+        async def analyze():
+            async with self.pools.connection(connection) as db:
+                analysis = await db.analyze_storage()
+            # Format cell text on a worker thread, not the GUI thread
+            columns = await asyncio.to_thread(_format_rows, analysis.get("tables", []))
+            self._analysis_cache[connection_id] = (time.monotonic(), analysis, columns)
+            return analysis, columns
+
+        # Runs on the shared event loop; the GUI stays responsive meanwhile
+        run_async(analyze(), self._on_analysis_done)
+
+    def _on_analysis_done(self, task):
+        """Route a finished analysis to the result or error handler"""
+        try:
+            result = task.result()
+        except Exception as e:
+            self._on_analysis_error(str(e))
+            return
+        self._on_analysis_finished(result)
 
-    def _on_analysis_finished(self, analysis):
+    def _on_analysis_finished(self, result):
         """Handle analysis completion"""
+        analysis, columns = result
         self.current_analysis = analysis
-        self._update_display(analysis)
+        self._update_display(analysis, columns)
         self.analyze_button.setEnabled(True)
+        self.refresh_button.setEnabled(True)
         self.analyze_button.setText(self.i18n.translate("dashboard.analyze"))
 
     def _on_analysis_error(self, error):
@@ -159,54 +195,64 @@ class DashboardWidget(QWidget):
             self, t("common.error"), f"{t('dashboard.analysis_failed')}:\n{error}"
         )
         self.analyze_button.setEnabled(True)
+        self.refresh_button.setEnabled(True)
         self.analyze_button.setText(t("dashboard.analyze"))
 
-    def _update_display(self, analysis):
-        """Update display with analysis results"""
-        t = self.i18n.translate
+    def invalidate_analysis(self, connection_id):
+        """Forget the cached analysis of a connection"""
+        self._analysis_cache.pop(connection_id, None)
+
+    def _update_display(self, analysis, columns):
+        """Update display with analysis results and their formatted rows"""
+        template = self.i18n.get_template
         # Update summary
         total_size = analysis.get("totalSize", 0)
         self.total_size_label.setText(
-            t("dashboard.total_size", size=self._format_size(total_size))
+            template("dashboard.total_size").format(size=_format_size(total_size))
         )
         self.table_count_label.setText(
-            t("dashboard.tables", count=analysis.get("tableCount", 0))
+            template("dashboard.tables").format(count=analysis.get("tableCount", 0))
         )
         self.index_count_label.setText(
-            t("dashboard.indexes", count=analysis.get("indexCount", 0))
+            template("dashboard.indexes").format(count=analysis.get("indexCount", 0))
         )
 
-        # Update tables table
-        tables = analysis.get("tables", [])
-        self.tables_table.setRowCount(len(tables))
-
-        for row, table in enumerate(tables):
-            self.tables_table.setItem(row, 0, QTableWidgetItem(table["name"]))
-            self.tables_table.setItem(
-                row, 1, QTableWidgetItem(self._format_size(table["size"]))
-            )
-            self.tables_table.setItem(row, 2, QTableWidgetItem(str(table["rowCount"])))
-            self.tables_table.setItem(
-                row, 3, QTableWidgetItem(self._format_size(table["indexSize"]))
-            )
-            self.tables_table.setItem(
-                row, 4, QTableWidgetItem(f"{table['bloat']:.2f}%")
-            )
-
-    def _format_size(self, size_bytes):
-        """Format size in bytes to human-readable format"""
-        for unit in ["B", "KB", "MB", "GB", "TB"]:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} PB"
+        # Update tables table a chunk at a time, sorting once at the end
+        self._fill_generation += 1
+        if self._sorting is None:
+            self._sorting = self.tables_table.isSortingEnabled()
+        self.tables_table.setSortingEnabled(False)
+        self.tables_table.setRowCount(len(columns[0]))
+        self._fill_chunk(self._fill_generation, columns, 0)
+
+    def _fill_chunk(self, generation, columns, start):
+        """Fill the next FILL_CHUNK_ROWS rows, then yield to the event loop"""
+        if generation != self._fill_generation:
+            return
+        end = min(start + FILL_CHUNK_ROWS, len(columns[0]))
+        self.tables_table.setUpdatesEnabled(False)
+        table = self.tables_table
+        for column, texts in enumerate(columns):
+            for row in range(start, end):
+                # Rows kept from the previous display are updated in place
+                item = table.item(row, column)
+                if item is None:
+                    table.setItem(row, column, QTableWidgetItem(texts[row]))
+                else:
+                    item.setText(texts[row])
+        self.tables_table.setUpdatesEnabled(True)
+
+        if end < len(columns[0]):
+            QTimer.singleShot(0, lambda: self._fill_chunk(generation, columns, end))
+        else:
+            self.tables_table.setSortingEnabled(self._sorting)
+            self._sorting = None
 
     def update_connections(self, connections):
         """Update connections list"""
         self.connections = connections
-        self.connection_combo.clear()
-        self.connection_combo.addItem(
-            self.i18n.translate("dashboard.select_connection")
+        set_connection_items(
+            self.connection_combo,
+            self.i18n.translate("dashboard.select_connection"),
+            self.connections,
         )
-        for conn in self.connections:
-            self.connection_combo.addItem(conn["name"], conn)
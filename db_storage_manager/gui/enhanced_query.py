@@ -2,6 +2,12 @@
 Enhanced query console with templates, auto-completion, and visualization
 """
 
+import contextlib
+import functools
+import re
+import time
+from collections import OrderedDict
+
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -9,25 +15,103 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QComboBox,
     QTextEdit,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
     QLabel,
     QCheckBox,
-    QMenu,
-    QAction,
-    QListWidget,
     QSplitter,
     QTabWidget,
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QTextCursor, QSyntaxHighlighter, QTextCharFormat, QColor
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor
 
-from ..db.factory import DatabaseConnectionFactory
-from ..db.base import ConnectionConfig
+from ..db.base import is_select_query, normalize_query
+from ..db.pool import DatabasePools
 from ..i18n.manager import get_i18n_manager
-from .utils import apply_glassmorphism
-from .charts import BarChartWidget, PieChartWidget
+from .utils import apply_glassmorphism, run_async, set_connection_items
+from .charts import BarChartWidget
+
+# Delay after the last template change before the editor is refilled
+TEMPLATE_DELAY_MS = 80
+
+# Rows read from the server, and added to the results view, at a time
+RESULT_BATCH_SIZE = 500
+
+# Rows the results view materializes at a time as it is scrolled
+RESULT_FETCH_ROWS = 200
+
+# Seconds a SELECT's result is shown again without re-running it, and the
+# number of results kept
+QUERY_CACHE_TTL = 30
+QUERY_CACHE_SIZE = 128
+
+# Leading keywords rejected in safe mode before any connection is made; the
+# backends still enforce safe mode on everything that gets through
+_UNSAFE_KEYWORDS = frozenset(
+    {"DROP", "DELETE", "TRUNCATE", "ALTER", "UPDATE", "INSERT", "GRANT", "REVOKE"}
+)
+
+def _to_float(value):
+    """A cell value as a float, or None if it is not numeric"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _to_columns(columns, rows):
+    """Transpose result rows into one list of values per column"""
+    if rows and isinstance(rows[0], tuple):
+        # ResultRow values are already in column order
+        return [list(values) for values in zip(*rows)]
+    return [[row.get(column, "") for row in rows] for column in columns]
+
+
+SQL_KEYWORDS = [
+    "SELECT",
+    "FROM",
+    "WHERE",
+    "INSERT",
+    "UPDATE",
+    "DELETE",
+    "CREATE",
+    "DROP",
+    "ALTER",
+    "TABLE",
+    "INDEX",
+    "DATABASE",
+    "JOIN",
+    "INNER",
+    "LEFT",
+    "RIGHT",
+    "OUTER",
+    "ON",
+    "AS",
+    "GROUP",
+    "BY",
+    "ORDER",
+    "HAVING",
+    "LIMIT",
+    "OFFSET",
+    "AND",
+    "OR",
+    "NOT",
+    "IN",
+    "LIKE",
+    "BETWEEN",
+    "IS",
+    "NULL",
+]
+
+# Every token the highlighter colours, matched in one left-to-right scan.
+# Comments and strings come first, so keywords inside them stay uncoloured.
+_SQL_TOKEN_RE = re.compile(
+    r"(?P<comment>--[^\n]*)"
+    r"|(?P<single>'[^']*')"
+    r'|(?P<double>"[^"]*")'
+    r"|(?P<keyword>\b(?:" + "|".join(SQL_KEYWORDS) + r")\b)",
+    re.IGNORECASE,
+)
 
 
 class SQLHighlighter(QSyntaxHighlighter):
@@ -35,69 +119,30 @@ class SQLHighlighter(QSyntaxHighlighter):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlighting_rules = []
 
-        # Keywords
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor(86, 156, 214))
         keyword_format.setFontWeight(700)
-        keywords = [
-            "SELECT",
-            "FROM",
-            "WHERE",
-            "INSERT",
-            "UPDATE",
-            "DELETE",
-            "CREATE",
-            "DROP",
-            "ALTER",
-            "TABLE",
-            "INDEX",
-            "DATABASE",
-            "JOIN",
-            "INNER",
-            "LEFT",
-            "RIGHT",
-            "OUTER",
-            "ON",
-            "AS",
-            "GROUP",
-            "BY",
-            "ORDER",
-            "HAVING",
-            "LIMIT",
-            "OFFSET",
-            "AND",
-            "OR",
-            "NOT",
-            "IN",
-            "LIKE",
-            "BETWEEN",
-            "IS",
-            "NULL",
-        ]
-        for keyword in keywords:
-            pattern = f"\\b{keyword}\\b"
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Strings
+
         string_format = QTextCharFormat()
         string_format.setForeground(QColor(206, 145, 120))
-        self.highlighting_rules.append(("'[^']*'", string_format))
-        self.highlighting_rules.append(('"[^"]*"', string_format))
 
-        # Comments
         comment_format = QTextCharFormat()
         comment_format.setForeground(QColor(106, 153, 85))
-        self.highlighting_rules.append(("--[^\n]*", comment_format))
+
+        # Format for each named group of _SQL_TOKEN_RE
+        self._formats = {
+            "comment": comment_format,
+            "single": string_format,
+            "double": string_format,
+            "keyword": keyword_format,
+        }
 
     def highlightBlock(self, text):
         """Highlight a block of text"""
-        for pattern, format in self.highlighting_rules:
-            import re
-
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                self.setFormat(match.start(), match.end() - match.start(), format)
+        for match in _SQL_TOKEN_RE.finditer(text):
+            start, end = match.span()
+            self.setFormat(start, end - start, self._formats[match.lastgroup])
 
 
 class QueryTemplates:
@@ -127,12 +172,87 @@ class QueryTemplates:
     }
 
 
+class ResultsModel(QAbstractTableModel):
+    """Table model over a query result; cells are formatted only when painted
+
+    Rows are exposed to the view RESULT_FETCH_ROWS at a time through
+    ``fetchMore``, as it scrolls towards the end of those already shown.
+    Values are stored one list per column, so a cell is two list indexes.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = []
+        self.values = []
+        self._row_count = 0
+        # Rows the view has been told about
+        self._loaded = 0
+
+    def set_result(self, columns, rows):
+        """Show a new result with a single view reset"""
+        self.beginResetModel()
+        self.columns = columns
+        self.values = _to_columns(columns, rows)
+        self._row_count = len(rows)
+        self._loaded = min(RESULT_FETCH_ROWS, len(rows))
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Add rows at the end; the view fetches them when it reaches them"""
+        if not rows:
+            return
+        shown_all = self._loaded == self._row_count
+        for values, added in zip(self.values, _to_columns(self.columns, rows)):
+            values.extend(added)
+        self._row_count += len(rows)
+        # A view already scrolled to the last row does not ask again
+        if shown_all:
+            self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._row_count
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(RESULT_FETCH_ROWS, self._row_count - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return str(self.values[index.column()][index.row()])
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.columns[section]
+        return None
+
+
 class EnhancedQueryWidget(QWidget):
     """Enhanced query console"""
 
-    def __init__(self, connections):
+    def __init__(self, connections, pools=None):
         super().__init__()
         self.connections = connections
+        self.pools = pools if pools is not None else DatabasePools()
+        # (connection id, normalized query, safe mode) -> (monotonic time, result)
+        self._query_cache = OrderedDict()
+        # Bumped per run; batches and errors of superseded runs are dropped
+        self._run_id = 0
         self.i18n = get_i18n_manager()
         self.setObjectName("glassmorphism")
         self.init_ui()
@@ -162,6 +282,12 @@ class EnhancedQueryWidget(QWidget):
         toolbar.addWidget(QLabel("Template:"))
         toolbar.addWidget(self.template_combo)
 
+        # Stepping through templates refills and re-highlights the editor once
+        self._template_timer = QTimer(self)
+        self._template_timer.setSingleShot(True)
+        self._template_timer.setInterval(TEMPLATE_DELAY_MS)
+        self._template_timer.timeout.connect(self._do_load_template)
+
         self.safe_mode_check = QCheckBox(t("query.safe_mode"))
         self.safe_mode_check.setChecked(True)
         toolbar.addWidget(self.safe_mode_check)
@@ -185,8 +311,10 @@ class EnhancedQueryWidget(QWidget):
         # Results area with tabs
         results_tabs = QTabWidget()
 
-        # Table view
-        self.results_table = QTableWidget()
+        # Table view; rows stay in the model and are read as they are painted
+        self.results_model = ResultsModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
         self.results_table.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Stretch
         )
@@ -203,9 +331,14 @@ class EnhancedQueryWidget(QWidget):
         layout.addWidget(splitter)
 
     def _load_template(self, template_name: str):
+        """Schedule loading a query template, restarting the delay on each change"""
+        self._template_timer.start()
+
+    def _do_load_template(self):
         """Load a query template"""
-        template = QueryTemplates.TEMPLATES.get(template_name, "")
-        self.query_edit.setPlainText(template)
+        template = QueryTemplates.TEMPLATES.get(self.template_combo.currentText(), "")
+        if template != self.query_edit.toPlainText():
+            self.query_edit.setPlainText(template)
 
     def _execute_query(self):
         """Execute query"""
@@ -221,79 +354,98 @@ class EnhancedQueryWidget(QWidget):
         if not query.strip():
             return
 
+        # A run still streaming must not add its rows to this run's results
+        self._run_id += 1
+        run_id = self._run_id
+
         safe_mode = self.safe_mode_check.isChecked()
+        if safe_mode and query.split(None, 1)[0].upper() in _UNSAFE_KEYWORDS:
+            self._display_error(self.i18n.translate("query.only_select_allowed"))
+            return
 
+        # Only SELECT results are reused; other statements always run
+        key = None
+        if is_select_query(query):
+            key = (connection["id"], normalize_query(query), safe_mode)
+            cached = self._query_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < QUERY_CACHE_TTL:
+                self._query_cache.move_to_end(key)
+                self._display_results(cached[1])
+                return
+
+        async def execute():
+            result = None
+            async with self.pools.connection(connection) as db:
+                # Closed on early exit, so the backend stops reading at once
+                async with contextlib.aclosing(
+                    db.stream_query(query, safe_mode, RESULT_BATCH_SIZE)
+                ) as batches:
+                    async for columns, rows in batches:
+                        if run_id != self._run_id:
+                            return
+                        if result is None:
+                            result = {"columns": columns, "rows": list(rows)}
+                            self._display_results(result)
+                        else:
+                            result["rows"].extend(rows)
+                            self._append_batch(rows)
+            if key is not None and result is not None:
+                self._cache_result(key, result)
+
+        run_async(execute(), functools.partial(self._on_query_finished, run_id))
+
+    def _cache_result(self, key, result):
+        """Keep a finished SELECT result, evicting the least recently used"""
+        self._query_cache[key] = (time.monotonic(), result)
+        self._query_cache.move_to_end(key)
+        while len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+
+    def _on_query_finished(self, run_id, task):
+        """Show the error of a failed query; results are shown as they stream"""
         try:
-            config = ConnectionConfig(**connection)
-            db = DatabaseConnectionFactory.create_connection(config)
-
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            async def execute():
-                await db.connect()
-                result = await db.execute_query(query, safe_mode)
-                await db.disconnect()
-                return result
-
-            result = loop.run_until_complete(execute())
-            loop.close()
-
-            # Display results
-            self._display_results(result)
+            task.result()
         except Exception as e:
-            self._display_error(str(e))
+            if run_id == self._run_id:
+                self._display_error(str(e))
+
+    def _append_batch(self, rows):
+        """Add a further batch of rows to the results view"""
+        self.results_model.append_rows(rows)
 
     def _display_results(self, result):
         """Display query results"""
         columns = result.get("columns", [])
-        rows = result.get("rows", [])
+        rows = list(result.get("rows", []))
 
         # Update table
-        self.results_table.setColumnCount(len(columns))
-        self.results_table.setHorizontalHeaderLabels(columns)
-        self.results_table.setRowCount(len(rows))
-
-        for row_idx, row_data in enumerate(rows):
-            for col_idx, col_name in enumerate(columns):
-                value = row_data.get(col_name, "")
-                self.results_table.setItem(
-                    row_idx, col_idx, QTableWidgetItem(str(value))
-                )
+        self.results_model.set_result(columns, rows)
 
-        # Update chart if numeric data
+        # Chart the first two columns of the first rows if the second is numeric
         if len(columns) >= 2 and rows:
-            try:
-                # Try to create a chart from first two columns
-                x_values = [str(row.get(columns[0], "")) for row in rows[:10]]
-                y_values = []
-                for row in rows[:10]:
-                    val = row.get(columns[1], 0)
-                    try:
-                        y_values.append(float(val))
-                    except (ValueError, TypeError):
-                        y_values.append(0)
-
-                if y_values:
-                    self.chart_widget = BarChartWidget("Query Results", x_values)
-                    self.chart_widget.add_data_set(columns[1], y_values)
-            except Exception:
-                pass
+            sample = rows[:10]
+            y_values = [_to_float(row.get(columns[1])) for row in sample]
+            if any(value is not None for value in y_values):
+                self.chart_widget.set_data(
+                    [str(row.get(columns[0], "")) for row in sample],
+                    [value or 0.0 for value in y_values],
+                    columns[1],
+                )
+                return
+        self.chart_widget.set_data([], [])
 
     def _display_error(self, error):
         """Display error message"""
-        t = self.i18n.translate
-        self.results_table.setColumnCount(1)
-        self.results_table.setHorizontalHeaderLabels([t("common.error")])
-        self.results_table.setRowCount(1)
-        self.results_table.setItem(0, 0, QTableWidgetItem(error))
+        title = self.i18n.translate("common.error")
+        self.results_model.set_result([title], [{title: error}])
 
     def update_connections(self, connections):
         """Update connections list"""
         self.connections = connections
-        self.connection_combo.clear()
-        self.connection_combo.addItem(self.i18n.translate("query.select_connection"))
-        for conn in self.connections:
-            self.connection_combo.addItem(conn["name"], conn)
+        # A connection's settings may have changed; its results may not hold
+        self._query_cache.clear()
+        set_connection_items(
+            self.connection_combo,
+            self.i18n.translate("query.select_connection"),
+            self.connections,
+        )
@@ -9,7 +9,11 @@ from PyQt6.QtWidgets import (
     QTabWidget,
     QMessageBox,
 )
+from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QAction
+import asyncio
+import functools
+import threading
 
 from .dashboard import DashboardWidget
 from .connections import ConnectionsWidget
@@ -17,10 +21,14 @@ from .query import QueryWidget
 from .backups import BackupsWidget
 from .settings import SettingsWidget
 from .monitoring import MonitoringWidget
+from ..db.pool import DatabasePools
 from ..security.store import SecureStore
 from ..i18n.manager import get_i18n_manager
 from ..themes.manager import get_theme_manager
-from .utils import apply_theme_to_app
+from .utils import apply_central_widget_style, apply_theme_to_app, run_async
+
+# Delay that coalesces a burst of connection changes into one save and refresh
+CONNECTIONS_SYNC_DELAY_MS = 50
 
 
 class MainWindow(QMainWindow):
@@ -32,6 +40,13 @@ class MainWindow(QMainWindow):
         self.i18n = get_i18n_manager()
         self.theme_manager = get_theme_manager()
         self.connections = self.secure_store.get_connections()
+        # Saves run on worker threads; versions keep an older snapshot from
+        # overwriting a newer one that finished first
+        self._save_lock = threading.Lock()
+        self._save_version = 0
+        self._saved_version = 0
+        # Connected databases shared by the dashboard and query console
+        self.pools = DatabasePools()
 
         self.setWindowTitle(self.i18n.translate("app.title"))
         self.setMinimumSize(1200, 800)
@@ -48,9 +63,9 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.tab_widget)
 
         # Create tabs
-        self.dashboard = DashboardWidget(self.connections)
+        self.dashboard = DashboardWidget(self.connections, self.pools)
         self.connections_widget = ConnectionsWidget()
-        self.query_widget = QueryWidget(self.connections)
+        self.query_widget = QueryWidget(self.connections, self.pools)
         self.backups_widget = BackupsWidget(self.connections)
         self.monitoring_widget = MonitoringWidget(self.connections)
         self.settings_widget = SettingsWidget()
@@ -74,6 +89,11 @@ class MainWindow(QMainWindow):
         self.connections_widget.connection_updated.connect(self._on_connection_updated)
         self.connections_widget.connection_deleted.connect(self._on_connection_deleted)
 
+        self._connections_timer = QTimer(self)
+        self._connections_timer.setSingleShot(True)
+        self._connections_timer.setInterval(CONNECTIONS_SYNC_DELAY_MS)
+        self._connections_timer.timeout.connect(self._flush_connection_changes)
+
         # Create menu bar
         self._create_menu_bar()
 
@@ -89,51 +109,55 @@ class MainWindow(QMainWindow):
     def _create_menu_bar(self):
         """Create application menu bar"""
         menubar = self.menuBar()
-
-        # Clear all existing menus to prevent duplicates
-        menubar.clear()
-
-        t = self.i18n.translate
+        # (action, translation key) pairs, retranslated in place
+        self._menu_texts = []
+
+        def add_menu(key):
+            menu = menubar.addMenu("")
+            self._menu_texts.append((menu.menuAction(), key))
+            return menu
+
+        def add_action(menu, key, slot, shortcut=None):
+            action = QAction(self)
+            if shortcut:
+                action.setShortcut(shortcut)
+            action.triggered.connect(slot)
+            menu.addAction(action)
+            self._menu_texts.append((action, key))
 
         # File menu
-        file_menu = menubar.addMenu(t("menu.file"))
-        exit_action = QAction(t("menu.exit"), self)
-        exit_action.setShortcut("Ctrl+Q")
-        exit_action.triggered.connect(self.close)
-        file_menu.addAction(exit_action)
+        file_menu = add_menu("menu.file")
+        add_action(file_menu, "menu.exit", self.close, "Ctrl+Q")
 
         # View menu
-        view_menu = menubar.addMenu(t("menu.view"))
-        dashboard_action = QAction(t("menu.dashboard"), self)
-        dashboard_action.setShortcut("Ctrl+1")
-        dashboard_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(0))
-        view_menu.addAction(dashboard_action)
-
-        connections_action = QAction(t("menu.connections"), self)
-        connections_action.setShortcut("Ctrl+2")
-        connections_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(1))
-        view_menu.addAction(connections_action)
-
-        query_action = QAction(t("menu.query_console"), self)
-        query_action.setShortcut("Ctrl+3")
-        query_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(2))
-        view_menu.addAction(query_action)
-
-        backups_action = QAction(t("menu.backups"), self)
-        backups_action.setShortcut("Ctrl+4")
-        backups_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(3))
-        view_menu.addAction(backups_action)
-
-        monitoring_action = QAction(t("menu.monitoring"), self)
-        monitoring_action.setShortcut("Ctrl+5")
-        monitoring_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(4))
-        view_menu.addAction(monitoring_action)
+        view_menu = add_menu("menu.view")
+        for tab, key in enumerate(
+            [
+                "menu.dashboard",
+                "menu.connections",
+                "menu.query_console",
+                "menu.backups",
+                "menu.monitoring",
+            ]
+        ):
+            add_action(
+                view_menu,
+                key,
+                lambda checked=False, tab=tab: self.tab_widget.setCurrentIndex(tab),
+                f"Ctrl+{tab + 1}",
+            )
 
         # Help menu
-        help_menu = menubar.addMenu(t("menu.help"))
-        about_action = QAction(t("menu.about"), self)
-        about_action.triggered.connect(self._show_about)
-        help_menu.addAction(about_action)
+        help_menu = add_menu("menu.help")
+        add_action(help_menu, "menu.about", self._show_about)
+
+        self._retranslate_menu_bar()
+
+    def _retranslate_menu_bar(self):
+        """Update menu and action texts with translations"""
+        t = self.i18n.translate
+        for action, key in self._menu_texts:
+            action.setText(t(key))
 
     def _show_about(self):
         """Show about dialog"""
@@ -163,44 +187,68 @@ class MainWindow(QMainWindow):
 
     def _apply_central_widget_style(self):
         """Apply proper styling to central widget"""
-        from ..themes.manager import get_theme_manager
-
-        theme_manager = get_theme_manager()
-        theme = theme_manager.get_theme()
-        colors = theme["colors"]
-
         central_widget = self.centralWidget()
         if central_widget:
-            central_widget.setStyleSheet(
-                f"""
-                QWidget {{
-                    background-color: {colors['background']};
-                    color: {colors['text']};
-                }}
-            """
-            )
+            apply_central_widget_style(central_widget)
 
     def _on_theme_changed(self, theme_key):
         """Handle theme change"""
         self._apply_theme()
-        # Recreate menu bar to apply theme
-        self._create_menu_bar()
+        self._apply_central_widget_style()
 
     def _on_language_changed(self, lang_code):
         """Handle language change"""
         self.setWindowTitle(self.i18n.translate("app.title"))
-        self._create_menu_bar()
+        self._retranslate_menu_bar()
         self._update_tabs()
         self.statusBar().showMessage(self.i18n.translate("common.ready"))
 
+    def _flush_connection_changes(self):
+        """Save the connections once and refresh each tab in its own event"""
+        self._save_version += 1
+        run_async(
+            asyncio.to_thread(
+                self._write_connections, list(self.connections), self._save_version
+            ),
+            self._on_connections_saved,
+        )
+        for widget in (
+            self.dashboard,
+            self.query_widget,
+            self.backups_widget,
+            self.monitoring_widget,
+        ):
+            QTimer.singleShot(
+                0, functools.partial(widget.update_connections, self.connections)
+            )
+
+    def _write_connections(self, connections, version):
+        """Save a snapshot of the connections unless a newer one is saved"""
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            self.secure_store.save_connections(connections)
+            self._saved_version = version
+
+    def _on_connections_saved(self, task):
+        """Report a failed background save in the status bar"""
+        try:
+            task.result()
+        except Exception as e:
+            self.statusBar().showMessage(f"{self.i18n.translate('common.error')}: {e}")
+
+    def closeEvent(self, event):
+        """Save connection changes still waiting on the sync delay"""
+        if self._connections_timer.isActive():
+            self._connections_timer.stop()
+            self._save_version += 1
+            self._write_connections(list(self.connections), self._save_version)
+        super().closeEvent(event)
+
     def _on_connection_added(self, connection):
         """Handle connection added"""
         self.connections.append(connection)
-        self.secure_store.save_connections(self.connections)
-        self.dashboard.update_connections(self.connections)
-        self.query_widget.update_connections(self.connections)
-        self.backups_widget.update_connections(self.connections)
-        self.monitoring_widget.update_connections(self.connections)
+        self._connections_timer.start()
 
     def _on_connection_updated(self, connection):
         """Handle connection updated"""
@@ -208,17 +256,14 @@ class MainWindow(QMainWindow):
             if conn["id"] == connection["id"]:
                 self.connections[i] = connection
                 break
-        self.secure_store.save_connections(self.connections)
-        self.dashboard.update_connections(self.connections)
-        self.query_widget.update_connections(self.connections)
-        self.backups_widget.update_connections(self.connections)
-        self.monitoring_widget.update_connections(self.connections)
+        # Connections opened with the old settings must not be reused
+        run_async(self.pools.discard(connection["id"]))
+        self.dashboard.invalidate_analysis(connection["id"])
+        self._connections_timer.start()
 
     def _on_connection_deleted(self, connection_id):
         """Handle connection deleted"""
         self.connections = [c for c in self.connections if c["id"] != connection_id]
-        self.secure_store.save_connections(self.connections)
-        self.dashboard.update_connections(self.connections)
-        self.query_widget.update_connections(self.connections)
-        self.backups_widget.update_connections(self.connections)
-        self.monitoring_widget.update_connections(self.connections)
+        run_async(self.pools.discard(connection_id))
+        self.dashboard.invalidate_analysis(connection_id)
+        self._connections_timer.start()
@@ -29,7 +29,7 @@ from ..analysis import (
     CapacityPlanner,
 )
 from ..i18n.manager import get_i18n_manager
-from .utils import apply_glassmorphism
+from .utils import apply_glassmorphism, run_async, set_connection_items
 
 
 class MonitoringWidget(QWidget):
@@ -167,32 +167,31 @@ class MonitoringWidget(QWidget):
             self.capacity_planner = CapacityPlanner(db)
 
             # Start monitoring
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
+            run_async(
                 self.monitor.start_monitoring(
                     on_alert=self._on_alert, on_metrics=self._on_metrics
-                )
+                ),
+                self._on_monitoring_started,
             )
-
-            self.start_button.setEnabled(False)
-            self.stop_button.setEnabled(True)
-            self.update_timer.start()
         except Exception as e:
-            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.critical(self, self.i18n.translate("common.error"), str(e))
 
+    def _on_monitoring_started(self, task):
+        """Switch the controls over once monitoring is running"""
+        try:
+            task.result()
+        except Exception as e:
             QMessageBox.critical(self, self.i18n.translate("common.error"), str(e))
+            return
+
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.update_timer.start()
 
     def _stop_monitoring(self):
         """Stop monitoring"""
         if self.monitor:
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.monitor.stop_monitoring())
+            run_async(self.monitor.stop_monitoring())
 
         self.update_timer.stop()
         self.start_button.setEnabled(True)
@@ -261,9 +260,8 @@ class MonitoringWidget(QWidget):
     def update_connections(self, connections):
         """Update connections list"""
         self.connections = connections
-        self.connection_combo.clear()
-        self.connection_combo.addItem(
-            self.i18n.translate("monitoring.select_connection")
+        set_connection_items(
+            self.connection_combo,
+            self.i18n.translate("monitoring.select_connection"),
+            self.connections,
         )
-        for conn in self.connections:
-            self.connection_combo.addItem(conn["name"], conn)
@@ -17,18 +17,18 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 
-from ..db.factory import DatabaseConnectionFactory
-from ..db.base import ConnectionConfig
+from ..db.pool import DatabasePools
 from ..i18n.manager import get_i18n_manager
-from .utils import apply_glassmorphism
+from .utils import apply_glassmorphism, run_async, set_connection_items
 
 
 class QueryWidget(QWidget):
     """Query console widget"""
 
-    def __init__(self, connections):
+    def __init__(self, connections, pools=None):
         super().__init__()
         self.connections = connections
+        self.pools = pools if pools is not None else DatabasePools()
         self.i18n = get_i18n_manager()
         self.setObjectName("glassmorphism")
         self.init_ui()
@@ -88,28 +88,22 @@ class QueryWidget(QWidget):
 
         safe_mode = self.safe_mode_check.isChecked()
 
-        try:
-            config = ConnectionConfig(**connection)
-            db = DatabaseConnectionFactory.create_connection(config)
-
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        async def execute():
+            async with self.pools.connection(connection) as db:
+                return await db.execute_query(query, safe_mode)
 
-            async def execute():
-                await db.connect()
-                result = await db.execute_query(query, safe_mode)
-                await db.disconnect()
-                return result
+        run_async(execute(), self._on_query_finished)
 
-            result = loop.run_until_complete(execute())
-            loop.close()
-
-            # Display results
-            self._display_results(result)
+    def _on_query_finished(self, task):
+        """Show the results or the error of a finished query"""
+        try:
+            result = task.result()
         except Exception as e:
             self._display_error(str(e))
+            return
+
+        # Display results
+        self._display_results(result)
 
     def _display_results(self, result):
         """Display query results"""
@@ -138,7 +132,8 @@ class QueryWidget(QWidget):
     def update_connections(self, connections):
         """Update connections list"""
         self.connections = connections
-        self.connection_combo.clear()
-        self.connection_combo.addItem(self.i18n.translate("query.select_connection"))
-        for conn in self.connections:
-            self.connection_combo.addItem(conn["name"], conn)
+        set_connection_items(
+            self.connection_combo,
+            self.i18n.translate("query.select_connection"),
+            self.connections,
+        )
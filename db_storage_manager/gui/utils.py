@@ -2,21 +2,88 @@
 GUI utilities for styling and i18n
 """
 
-from PyQt6.QtWidgets import QWidget
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtWidgets import QComboBox, QWidget
 from ..i18n.manager import get_i18n_manager
 from ..themes.manager import get_theme_manager
+from ..themes.themes import THEMES, DEFAULT_THEME
+
+# Tasks started by run_async; the event loop only holds weak references
+_pending_tasks: Set["asyncio.Future[Any]"] = set()
+
+
+def run_async(
+    coroutine: Awaitable[Any],
+    on_done: Optional[Callable[["asyncio.Future[Any]"], None]] = None,
+) -> "asyncio.Future[Any]":
+    """Run a coroutine on the application's event loop without blocking the UI
+
+    ``on_done`` receives the finished task; calling ``task.result()`` there
+    returns the value or raises the error. It runs outside the task, so it
+    may open modal dialogs.
+    """
+    task = asyncio.ensure_future(coroutine)
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+    if on_done is not None:
+        task.add_done_callback(on_done)
+    return task
+
+
+def set_connection_items(
+    combo: QComboBox, placeholder: str, connections: List[Dict[str, Any]]
+) -> None:
+    """Refill a connection combo box by swapping in a prebuilt model
+
+    The selected connection is kept when it still exists, and
+    ``currentIndexChanged`` is emitted at most once, only if the selection
+    moved or its settings changed.
+    """
+    selected = combo.currentData()
+    selected_id = selected.get("id") if isinstance(selected, dict) else None
+
+    # Parented to the combo, so Qt deletes the model it replaces
+    model = QStandardItemModel(combo)
+    model.appendRow(QStandardItem(placeholder))
+    index = 0
+    for row, conn in enumerate(connections, start=1):
+        item = QStandardItem(conn["name"])
+        item.setData(conn, Qt.ItemDataRole.UserRole)
+        model.appendRow(item)
+        if conn.get("id") == selected_id:
+            index = row
+
+    previous = combo.currentIndex()
+    blocked = combo.blockSignals(True)
+    try:
+        combo.setModel(model)
+        combo.setCurrentIndex(index)
+    finally:
+        combo.blockSignals(blocked)
+    if index != previous or combo.itemData(index) != selected:
+        combo.currentIndexChanged.emit(index)
 
 
 def apply_glassmorphism(widget: QWidget) -> None:
     """Apply glassmorphism styling to a widget"""
-    theme_manager = get_theme_manager()
-    theme = theme_manager.get_theme()
+    # Apply glassmorphism background to the widget itself
+    theme_name = get_theme_manager().current_theme
+    _set_stylesheet(widget, _glassmorphism_stylesheet(theme_name))
+
+
+@functools.lru_cache(maxsize=None)
+def _glassmorphism_stylesheet(theme_name: str) -> str:
+    """Build the glassmorphism stylesheet once per theme"""
+    theme = THEMES.get(theme_name, THEMES[DEFAULT_THEME])
     glass = theme["glassmorphism"]
     colors = theme["colors"]
 
-    # Apply glassmorphism background to the widget itself
-    widget.setStyleSheet(
-        f"""
+    return f"""
         QWidget {{
             background-color: {glass['background']};
             border: 1px solid {glass['border']};
@@ -56,14 +123,14 @@ def apply_glassmorphism(widget: QWidget) -> None:
             border-radius: 6px;
             padding: 6px;
         }}
-        QTableWidget {{
+        QTableView {{
             background-color: {colors['surface']};
             color: {colors['text']};
             border: 1px solid {colors['border']};
             border-radius: 6px;
             gridline-color: {colors['border']};
         }}
-        QTableWidget::item {{
+        QTableView::item {{
             padding: 4px;
         }}
         QHeaderView::section {{
@@ -93,17 +160,43 @@ def apply_glassmorphism(widget: QWidget) -> None:
             padding: 6px;
         }}
     """
-    )
 
 
 def apply_theme_to_app(app) -> None:
     """Apply theme to entire application"""
-    theme_manager = get_theme_manager()
-    theme = theme_manager.get_theme()
-    colors = theme["colors"]
+    _set_stylesheet(app, _app_stylesheet(get_theme_manager().current_theme))
+
+
+def apply_central_widget_style(widget: QWidget) -> None:
+    """Apply the theme background to a window's central widget"""
+    _set_stylesheet(widget, _central_stylesheet(get_theme_manager().current_theme))
+
+
+def _set_stylesheet(widget: QWidget, stylesheet: str) -> None:
+    # Qt re-parses and re-polishes on every call, even for the same text
+    if widget.styleSheet() != stylesheet:
+        widget.setStyleSheet(stylesheet)
+
+
+@functools.lru_cache(maxsize=None)
+def _central_stylesheet(theme_name: str) -> str:
+    """Build the central widget stylesheet once per theme"""
+    colors = THEMES.get(theme_name, THEMES[DEFAULT_THEME])["colors"]
+
+    return f"""
+        QWidget {{
+            background-color: {colors['background']};
+            color: {colors['text']};
+        }}
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def _app_stylesheet(theme_name: str) -> str:
+    """Build the application stylesheet once per theme"""
+    colors = THEMES.get(theme_name, THEMES[DEFAULT_THEME])["colors"]
 
-    app.setStyleSheet(
-        f"""
+    return f"""
         QMainWindow {{
             background-color: {colors['background']};
             color: {colors['text']};
@@ -163,4 +256,3 @@ def apply_theme_to_app(app) -> None:
             background-color: {colors['secondary']};
         }}
     """
-    )
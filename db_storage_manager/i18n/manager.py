@@ -4,7 +4,7 @@ Internationalization manager
 
 import json
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from .languages import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE, RTL_LANGUAGES
 from ..config import USER_DATA_DIR
 
@@ -18,6 +18,8 @@ class I18nManager:
     def __init__(self):
         self.current_language = DEFAULT_LANGUAGE
         self.translations: Dict[str, Dict[str, str]] = {}
+        # Resolved lookups for the current language, keyed by dotted key
+        self._resolved: Dict[str, Any] = {}
         self.load_language_preference()
         self.load_translations(self.current_language)
 
@@ -47,6 +49,7 @@ class I18nManager:
         if language not in SUPPORTED_LANGUAGES:
             language = DEFAULT_LANGUAGE
 
+        self._resolved.clear()
         translation_file = TRANSLATIONS_DIR / f"{language}.json"
         if translation_file.exists():
             try:
@@ -65,6 +68,7 @@ class I18nManager:
         """Set current language"""
         if language in SUPPORTED_LANGUAGES:
             self.current_language = language
+            self._resolved.clear()
             self.load_translations(language)
             self.save_language_preference()
 
@@ -73,19 +77,10 @@ class I18nManager:
 
         Supports nested keys like 'dashboard.connection' or 'common.ok'
         """
-        translations = self.translations.get(self.current_language, {})
-
-        # Handle nested keys (e.g., "dashboard.connection")
-        keys = key.split(".")
-        text = translations
-        for k in keys:
-            if isinstance(text, dict):
-                text = text.get(k)
-                if text is None:
-                    break
-            else:
-                text = None
-                break
+        try:
+            text = self._resolved[key]
+        except KeyError:
+            text = self._resolved[key] = self._lookup(key)
 
         if text is None:
             text = default or key
@@ -99,6 +94,29 @@ class I18nManager:
 
         return text
 
+    def get_template(self, key: str) -> str:
+        """Raw format string of a key in the current language, or the key"""
+        try:
+            text = self._resolved[key]
+        except KeyError:
+            text = self._resolved[key] = self._lookup(key)
+        return text if isinstance(text, str) else key
+
+    def _lookup(self, key: str) -> Any:
+        """Walk the current language's translations along a dotted key"""
+        translations = self.translations.get(self.current_language, {})
+
+        # Handle nested keys (e.g., "dashboard.connection")
+        text = translations
+        for k in key.split("."):
+            if isinstance(text, dict):
+                text = text.get(k)
+                if text is None:
+                    break
+            else:
+                return None
+        return text
+
     def is_rtl(self) -> bool:
         """Check if current language is RTL"""
         return self.current_language in RTL_LANGUAGES
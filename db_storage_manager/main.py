@@ -2,7 +2,10 @@
 Main entry point for DB Storage Manager
 """
 
+import asyncio
 import sys
+
+import qasync
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon
@@ -23,6 +26,10 @@ def main():
     app.setApplicationVersion(APP_VERSION)
     app.setOrganizationName("VoxHash")
 
+    # One asyncio loop driven by Qt's, shared by every widget
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
     # Set application style
     app.setStyle("Fusion")
 
@@ -42,7 +49,8 @@ def main():
     window.show()
 
     # Run application
-    sys.exit(app.exec())
+    with loop:
+        sys.exit(loop.run_forever())
 
 
 if __name__ == "__main__":
@@ -28,11 +28,13 @@ setup(
     install_requires=[
         "PyQt6>=6.6.0",
         "PyQt6-Charts>=6.6.0",
-        "psycopg2-binary>=2.9.9",
+        "qasync>=0.27.1",
+        "asyncpg>=0.29.0",
         "pymysql>=1.1.0",
         "aiosqlite>=0.19.0",
         "pymongo>=4.6.0",
-        "redis>=5.0.0",
+        "motor>=3.3.0",
+        "redis>=5.0.1",
         "boto3>=1.34.0",
         "google-api-python-client>=2.100.0",
         "google-auth-httplib2>=0.1.1",